@@ -2,8 +2,22 @@
 
 import asyncio
 import logging
-import sys
 import signal # For handling shutdown signals
+from pathlib import Path
+
+# Load .env into os.environ once, before any src module constructs Settings;
+# pydantic-settings then reads plain environment variables with no file I/O
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent / ".env", override=False)
+
+# Use uvloop when available: a drop-in libuv-based event loop that roughly
+# doubles asyncio throughput on the socket-heavy polling/LLM/checkpoint mix
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass # Fall back to the stock asyncio event loop
+
 from telegram import Update # <-- Add this import
 
 # Import the logging setup function first to configure logging early
@@ -12,8 +26,9 @@ from src.utils.logging_config import setup_logging
 # Import the function to setup the Telegram bot application
 from src.integrations.messengers.telegram import setup_bot
 # Import checkpointer context factory and graph compilation function
-from src.memory.checkpointer import get_checkpointer_context
+from src.memory.checkpointer import get_checkpointer_context, apply_performance_pragmas
 from src.agent.graph import compile_graph
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__) # Define logger after setup
 
@@ -38,6 +53,10 @@ async def main() -> None:
         async with checkpointer_context as checkpointer:
             logger.info("Контекст чекпоинтера установлен.")
 
+            # Tune SQLite for the checkpointer's write-heavy workload (WAL,
+            # relaxed fsync) before any graph state is persisted
+            await apply_performance_pragmas(checkpointer)
+
             # Compile the graph INSIDE the context manager
             graph = await compile_graph(checkpointer)
             if not graph:
@@ -51,18 +70,58 @@ async def main() -> None:
             logger.info("Инициализация приложения бота...")
             await application.initialize()
 
-            # Start polling in the background. This does NOT block.
+            # Start receiving updates in the background. This does NOT block.
             logger.info("Запуск обработки сообщений бота...")
             await application.start()
-            await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+            settings = get_settings()
+            if settings.TELEGRAM_WEBHOOK_URL:
+                # Webhook: Telegram pushes updates the moment they arrive —
+                # no getUpdates round-trips at all. The bot token in the path
+                # keeps the endpoint unguessable.
+                webhook_path = settings.TELEGRAM_BOT_TOKEN
+                await application.updater.start_webhook(
+                    listen=settings.TELEGRAM_WEBHOOK_LISTEN,
+                    port=settings.TELEGRAM_WEBHOOK_PORT,
+                    url_path=webhook_path,
+                    webhook_url=f"{settings.TELEGRAM_WEBHOOK_URL.rstrip('/')}/{webhook_path}",
+                    allowed_updates=Update.ALL_TYPES
+                )
+                logger.info("Бот получает обновления через вебхук.")
+            else:
+                # Long-poll: a 30s server-side timeout instead of rapid short
+                # polls cuts getUpdates traffic dramatically; poll_interval=0
+                # re-polls immediately after each (long) response
+                await application.updater.start_polling(
+                    timeout=30,
+                    poll_interval=0.0,
+                    allowed_updates=Update.ALL_TYPES
+                )
+
+            # Keep the application running until a shutdown signal arrives
+            loop = asyncio.get_running_loop()
+            stop_event = asyncio.Event()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, stop_event.set)
+                except NotImplementedError:
+                    # add_signal_handler is unavailable on Windows event loops;
+                    # fall back to the synchronous signal module
+                    signal.signal(sig, lambda *_: stop_event.set())
 
-            # Keep the application running until interrupted
             logger.info("Бот запущен. Нажмите Ctrl+C для остановки.")
-            while True:
-                await asyncio.sleep(3600) # Sleep for a long time
+            await stop_event.wait()
+            logger.info("Получен сигнал завершения работы.")
+
+            # Cancel in-flight tasks (polling fetch, update handlers) so the
+            # finalizers below don't race with still-running work
+            pending = [
+                task for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-    except (KeyboardInterrupt, SystemExit): # Catch signals gracefully
-        logger.info("Получен сигнал завершения работы.")
     except Exception as e:
          logger.critical(f"Приложение столкнулось с критической ошибкой: {e}", exc_info=True)
     finally:
@@ -76,7 +135,7 @@ async def main() -> None:
             logger.info("Остановка обработки сообщений...")
             await application.updater.stop()
         # Check if application itself needs stopping (separate from polling)
-        if 'application' in locals() and application.running:
+        if application is not None and application.running:
             logger.info("Завершение работы приложения...")
             await application.stop()
             await application.shutdown()
@@ -84,17 +143,20 @@ async def main() -> None:
         else:
              logger.info("Приложение завершилось или не смогло полностью запуститься.")
 
-# --- Entry Point --- 
+# --- Entry Point ---
 
-if __name__ == "__main__":
-    # Standard pattern to run the main async function
+def run() -> None:
+    """Drives the async main function, treating Ctrl+C as a clean exit.
+
+    Errors inside main are already logged there; cancellation propagating
+    out of asyncio.run during shutdown must not be recorded as a spurious
+    critical error.
+    """
     try:
         asyncio.run(main())
-    except Exception as e:
-        # Catch errors during asyncio.run itself (less likely now)
-        logging.critical(f"Ошибка выполнения asyncio.run: {e}", exc_info=True)
-        sys.exit(1)
     except KeyboardInterrupt:
-         # This might be caught by the inner handler, but good to have
-         logging.info("Приложение остановлено сочетанием клавиш KeyboardInterrupt (main).")
-         sys.exit(0) 
\ No newline at end of file
+        logging.info("Приложение остановлено сочетанием клавиш KeyboardInterrupt.")
+
+
+if __name__ == "__main__":
+    run()
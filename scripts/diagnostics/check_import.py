@@ -0,0 +1,43 @@
+# check_import.py — environment diagnostic for langgraph-checkpoint-sqlite.
+# Lives under scripts/diagnostics/ so it is never on the production import
+# path and can't be executed accidentally at container start.
+import importlib.util
+import sys
+import site
+
+
+def main() -> None:
+    print("--- Python Executable ---")
+    print(sys.executable)
+    print("-" * 25)
+
+    print("--- sys.path ---")
+    for path_item in sys.path:
+        print(path_item)
+    print("-" * 25)
+
+    print("--- Site Packages ---")
+    print(site.getsitepackages())
+    print("-" * 25)
+
+    print("--- Checking Imports ---")
+    # find_spec locates the package without executing it — no side effects
+    # and none of the aiosqlite/langgraph import cost
+    spec = importlib.util.find_spec("langgraph_checkpoint_sqlite")
+    if spec is None:
+        print("FAILED: package 'langgraph_checkpoint_sqlite' not found")
+    else:
+        print(f"SUCCESS: 'langgraph_checkpoint_sqlite' found at {spec.origin}")
+        try:
+            from langgraph_checkpoint_sqlite import SqliteSaver
+            print("SUCCESS: 'from langgraph_checkpoint_sqlite import SqliteSaver'")
+        except ImportError as e:
+            print(f"FAILED: 'from langgraph_checkpoint_sqlite import SqliteSaver': {e}")
+        except Exception as e:
+            print(f"UNEXPECTED ERROR during import: {type(e).__name__}: {e}")
+
+    print("-" * 25)
+
+
+if __name__ == "__main__":
+    main()
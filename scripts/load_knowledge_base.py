@@ -9,18 +9,25 @@ metadata extraction including RBAC information based on file paths or defaults.
 
 # Import necessary libraries
 import argparse
+import asyncio
 import logging
+import os
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
-import uuid
+
+# Load .env before importing project components that construct Settings
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parents[1] / ".env", override=False)
 
 # Import project components
-from src.config.settings import settings
+from src.config.settings import get_settings
 from src.knowledge.document_processor import DocumentProcessor
-from src.knowledge.qdrant_manager import qdrant_manager
+from src.knowledge.qdrant_manager import get_qdrant_manager
 from src.config.embedding_factory import get_embedding_model
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as rest
 from langchain_core.documents import Document
 
@@ -32,6 +39,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger("knowledge_base_loader")
 
+# Maximum number of embed+upsert batches allowed in flight at once.
+# Embedding and upserting are both I/O-bound, so overlapping a handful of
+# batches hides the HTTP round-trips behind chunk extraction of later files.
+MAX_CONCURRENT_BATCHES = 6
+
+# Cap on concurrent embedding API requests, independent of the consumer
+# count, so provider rate limits are respected even if MAX_CONCURRENT_BATCHES
+# is raised. Safe to create at module level (binds to the loop on first use).
+_embed_semaphore = asyncio.Semaphore(8)
+
+# File types the loaders can actually ingest; everything else (binaries,
+# .git internals, editor droppings) is skipped before any Path work
+_INGESTIBLE_SUFFIXES = {'.pdf', '.txt', '.md', '.docx', '.html'}
+
+# Known embedding model vector sizes, matched by substring of the model name
+_MODEL_VECTOR_SIZES = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "e5-": 1024,  # HuggingFace E5 family
+}
+
 
 def get_vector_size(model_name: str) -> int:
     """
@@ -43,19 +72,14 @@ def get_vector_size(model_name: str) -> int:
     Returns:
         int: The vector size for the specified model.
     """
-    # Known model sizes
-    if "text-embedding-3-small" in model_name:
-        return 1536
-    elif "text-embedding-3-large" in model_name:
-        return 3072
-    elif "text-embedding-ada-002" in model_name:
-        return 1536
-    elif "e5-" in model_name.lower():  # HuggingFace E5 family
-        return 1024
-    # Add cases for other potential embedding models as needed
-    else:
-        logger.warning(f"Unknown embedding model '{model_name}' for vector size. Defaulting to 1536.")
-        return 1536
+    # Match against the known model sizes table (add new models there)
+    model_name_lower = model_name.lower()
+    for key, size in _MODEL_VECTOR_SIZES.items():
+        if key in model_name_lower:
+            return size
+
+    logger.warning(f"Unknown embedding model '{model_name}' for vector size. Defaulting to 1536.")
+    return 1536
 
 
 def parse_args() -> argparse.Namespace:
@@ -102,134 +126,213 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def process_documents(
+async def process_documents(
     docs_dir: Path,
     default_roles: List[str],
     processor: DocumentProcessor,
     embedding_model: Any,
+    async_client: AsyncQdrantClient,
     batch_size: int
 ) -> Tuple[int, int]:
     """
     Process documents from the specified directory, generate embeddings,
     and upload them to Qdrant.
-    
+
+    A producer coroutine streams chunks into a bounded queue while
+    MAX_CONCURRENT_BATCHES consumer coroutines embed and upsert batches
+    concurrently, so network round-trips overlap with chunk extraction and
+    peak memory stays bounded regardless of corpus size.
+
     Args:
         docs_dir: Path to the directory containing documents
         default_roles: Default roles to assign if none are inferred
         processor: The DocumentProcessor instance
         embedding_model: The embedding model to use
+        async_client: Async Qdrant client used for concurrent upserts
         batch_size: Number of chunks to process in each batch
-        
+
     Returns:
         Tuple[int, int]: Number of files and chunks processed
     """
     total_files = 0
     total_chunks = 0
-    batch_chunks = []
     start_time = time.time()
-    
-    # Get all files recursively
-    all_files = list(docs_dir.rglob('*'))
-    logger.info(f"Found {len(all_files)} potential files to process")
-    
-    for file_idx, file_path in enumerate(all_files):
-        # Skip directories
-        if file_path.is_dir():
-            continue
-            
-        try:
-            logger.info(f"Processing file {file_idx+1}/{len(all_files)}: {file_path.relative_to(docs_dir)}")
-            
-            # Collect chunks from this document
-            file_chunks = 0
-            for chunk in processor.load_and_split_documents(file_path, default_roles=default_roles):
-                batch_chunks.append(chunk)
-                file_chunks += 1
-                
-                # Process batch if it's full
-                if len(batch_chunks) >= batch_size:
-                    process_batch(batch_chunks, embedding_model)
-                    total_chunks += len(batch_chunks)
-                    batch_chunks = []
-                    
-            logger.info(f"Extracted {file_chunks} chunks from {file_path.name}")
+
+    # Bounded queue: backpressure caps peak memory to O(batch_size * consumers)
+    # chunks instead of materializing the whole corpus up front.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 4)
+    _SENTINEL = object()  # Signals consumers that the producer is done
+
+    # Loading and splitting a file is CPU/IO-bound parsing work; run it across
+    # a thread pool so several files are extracted in parallel while the
+    # consumers drain the queue.
+    max_workers = os.cpu_count() or 4
+    loop = asyncio.get_running_loop()
+
+    def _extract_file(file_path: Path) -> Tuple[Path, List[Document]]:
+        """Loads and splits one file in a worker thread."""
+        return file_path, list(
+            processor.load_and_split_documents(file_path, default_roles=default_roles)
+        )
+
+    async def _flush_completed(done_futures) -> None:
+        """Feeds chunks from finished extraction futures into the queue."""
+        nonlocal total_files
+        for future in done_futures:
+            try:
+                file_path, chunks = future.result()
+            except Exception as e:
+                logger.error(f"Error processing file: {e}", exc_info=True)
+                continue
+
+            for chunk in chunks:
+                await queue.put(chunk)  # Blocks when the queue is full
+
+            logger.info(f"Extracted {len(chunks)} chunks from {file_path.name}")
             total_files += 1
-            
+
             # Show progress periodically
             if total_files % 10 == 0:
                 elapsed_time = time.time() - start_time
                 logger.info(
-                    f"Progress: {total_files} files and {total_chunks + len(batch_chunks)} "
+                    f"Progress: {total_files} files and {total_chunks} "
                     f"chunks processed in {elapsed_time:.1f}s"
                 )
-                
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}", exc_info=True)
-            
-    # Process any remaining chunks in the last batch
-    if batch_chunks:
-        process_batch(batch_chunks, embedding_model)
-        total_chunks += len(batch_chunks)
-        
+
+    async def producer() -> None:
+        """Walks the corpus lazily and feeds chunks into the bounded queue."""
+        pending: set = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Iterate rglob lazily; no need to materialize all paths up front
+            for file_path in docs_dir.rglob('*'):
+                # Skip directories, hidden files/dirs (.git, .DS_Store, ...)
+                # and anything the loaders can't ingest. Only components
+                # inside the corpus count as hidden — docs_dir itself may
+                # legitimately live under a dot-directory
+                if not file_path.is_file():
+                    continue
+                if any(
+                    part.startswith('.')
+                    for part in file_path.relative_to(docs_dir).parts
+                ):
+                    continue
+                if file_path.suffix.lower() not in _INGESTIBLE_SUFFIXES:
+                    logger.debug(f"Skipping unsupported file type: {file_path.name}")
+                    continue
+
+                rel_path = file_path.relative_to(docs_dir)
+                logger.info(f"Scheduling file: {rel_path}")
+                pending.add(loop.run_in_executor(executor, _extract_file, file_path))
+
+                # Bound the number of extracted-but-undrained files
+                if len(pending) >= max_workers:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    await _flush_completed(done)
+
+            if pending:
+                done, _ = await asyncio.wait(pending)
+                await _flush_completed(done)
+
+        # Wake every consumer so they can drain their last partial batch and exit
+        for _ in range(MAX_CONCURRENT_BATCHES):
+            await queue.put(_SENTINEL)
+
+    async def consumer() -> None:
+        """Drains batch_size chunks at a time, embedding and upserting each batch."""
+        nonlocal total_chunks
+        batch_chunks: List[Document] = []
+        while True:
+            item = await queue.get()
+            done = item is _SENTINEL
+            if not done:
+                batch_chunks.append(item)
+
+            if batch_chunks and (done or len(batch_chunks) >= batch_size):
+                await process_batch(batch_chunks, embedding_model, async_client)
+                total_chunks += len(batch_chunks)
+                batch_chunks = []
+
+            if done:
+                return
+
+    await asyncio.gather(
+        producer(),
+        *(consumer() for _ in range(MAX_CONCURRENT_BATCHES))
+    )
+
     return total_files, total_chunks
 
 
-def process_batch(batch_chunks: List[Document], embedding_model: Any) -> None:
+async def process_batch(
+    batch_chunks: List[Document],
+    embedding_model: Any,
+    async_client: AsyncQdrantClient
+) -> None:
     """
     Process a batch of document chunks: generate embeddings and upload to Qdrant.
-    
+
+    Both steps use the async clients so several batches can run concurrently.
+
     Args:
         batch_chunks: List of Document chunks to process
         embedding_model: The embedding model to use
+        async_client: Async Qdrant client used for the upsert
     """
     if not batch_chunks:
         return
-        
+
     # Extract texts for embedding
     batch_texts = [chunk.page_content for chunk in batch_chunks]
-    
+
     try:
         # Generate embeddings
         logger.debug(f"Generating embeddings for {len(batch_texts)} chunks")
-        batch_embeddings = embedding_model.embed_documents(batch_texts)
-        
-        # Prepare Qdrant points
-        qdrant_points = []
-        for i, (chunk, embedding) in enumerate(zip(batch_chunks, batch_embeddings)):
-            # Generate a unique ID for Qdrant Point
-            point_id = uuid.uuid4().hex # ALWAYS generate a UUID for the Qdrant ID
-            
-            # Prepare payload - keep original chunk_id here if needed
-            payload = chunk.metadata.copy()
-            payload['text'] = chunk.page_content  # Ensure text is in payload for retrieval
-            
-            # Create point
-            qdrant_point = rest.PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload=payload
-            )
-            qdrant_points.append(qdrant_point)
-            
-        # Upload to Qdrant
-        logger.debug(f"Upserting {len(qdrant_points)} points to Qdrant")
-        result = qdrant_manager.upsert_points(qdrant_points)
-        if result is None:
-            logger.error("Failed to upsert points to Qdrant")
-            
+        async with _embed_semaphore:
+            batch_embeddings = await embedding_model.aembed_documents(batch_texts)
+        # Texts are only needed for embedding; drop the list so the chunk
+        # strings are referenced once (via the payloads) during upsert.
+        del batch_texts
+
+        # Generate unique IDs for the whole batch with a single urandom read
+        # (one syscall instead of one per chunk; same 128-bit uniqueness as uuid4)
+        raw_ids = os.urandom(16 * len(batch_chunks))
+        point_ids = [raw_ids[i * 16:(i + 1) * 16].hex() for i in range(len(batch_chunks))]
+
+        # Payloads reference the chunks' text directly instead of copying
+        # the metadata dicts and re-inserting the content
+        payloads = [
+            {**chunk.metadata, 'text': chunk.page_content}  # Text kept for retrieval
+            for chunk in batch_chunks
+        ]
+
+        # Upload to Qdrant as a columnar Batch (one ids/vectors/payloads triple
+        # instead of N PointStruct objects, skipping per-point pydantic
+        # validation). wait=False returns once Qdrant acks the WAL write, so
+        # the loader moves on to the next batch immediately.
+        logger.debug(f"Upserting {len(point_ids)} points to Qdrant")
+        await async_client.upsert(
+            collection_name=get_settings().QDRANT_COLLECTION_NAME,
+            points=rest.Batch(ids=point_ids, vectors=batch_embeddings, payloads=payloads),
+            wait=False
+        )
+
     except Exception as e:
         logger.error(f"Error processing batch: {e}", exc_info=True)
 
 
-def main():
+async def main():
     """Main entry point for the script."""
     args = parse_args()
+    settings = get_settings()
     
     logger.info("Starting document loading process")
     logger.info(f"Settings: docs_dir={args.docs_dir}, default_roles={args.default_roles}, "
                 f"recreate_collection={args.recreate_collection}, batch_size={args.batch_size}")
     
-    # Check if Qdrant manager is available
+    # Check if Qdrant manager is available (built lazily on first call)
+    qdrant_manager = get_qdrant_manager()
     if qdrant_manager is None:
         logger.error("Qdrant manager is not available. Please check the connection to Qdrant.")
         sys.exit(1)
@@ -278,14 +381,38 @@ def main():
         logger.error(f"Documents directory '{docs_dir}' does not exist or is not a directory.")
         sys.exit(1)
     
+    # Async client for concurrent upserts (the sync qdrant_manager client is
+    # still used above for collection management)
+    async_client = AsyncQdrantClient(
+        host=settings.QDRANT_HOST,
+        port=settings.QDRANT_PORT,
+        api_key=settings.QDRANT_API_KEY,
+        # Upserts dominate this script; gRPC ships vectors as raw float32
+        # bytes instead of JSON floats
+        prefer_grpc=True,
+        grpc_port=6334,
+        timeout=20
+    )
+
+    # Warm up the embedding client (opens the HTTP session, loads tokenizer
+    # data) so first-call overhead isn't attributed to the first batch and the
+    # throughput numbers below stay accurate
+    try:
+        await embedding_model.aembed_documents(["warmup"])
+        logger.debug("Embedding model warmed up.")
+    except Exception as e:
+        logger.warning(f"Embedding warmup call failed (continuing anyway): {e}")
+
     start_time = time.time()
-    total_files, total_chunks = process_documents(
+    total_files, total_chunks = await process_documents(
         docs_dir=docs_dir,
         default_roles=default_roles,
         processor=processor,
         embedding_model=embedding_model,
+        async_client=async_client,
         batch_size=args.batch_size
     )
+    await async_client.close()
     
     # Log completion
     elapsed_time = time.time() - start_time
@@ -295,4 +422,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -1,15 +1,22 @@
 """Node for generating responses using the LLM, potentially calling tools."""
 
+import hashlib
 import logging
 from typing import Dict, List, Optional, Any
 
-from langchain_core.messages import (AIMessage, BaseMessage, HumanMessage,
-                                   SystemMessage)
+from langchain_core.messages import (AIMessage, AIMessageChunk, BaseMessage,
+                                   HumanMessage, SystemMessage)
+from langchain_core.runnables import RunnableConfig
 
 from src.agent.state import AgentState
+from src.cache.semantic_llm_cache import SemanticLLMCache
+from src.config.embedding_factory import get_embedding_model
 from src.config.llm_factory import get_chat_model
+from src.config.settings import get_settings
+from src.knowledge.embedding_cache import CachedEmbeddings
+from src.utils.doc_compression import compress_docs
 # Import the specific tool function(s) decorated with @tool
-from src.tools.crm_tools import get_crm_customer_info
+from src.tools.crm_tools import get_crm_customer_info, get_crm_customers_info
 
 logger = logging.getLogger(__name__)
 
@@ -32,60 +39,44 @@ except Exception as e: # Catch any other unexpected errors
 
 # Define the list of tools available to the LLM
 # Ensure these are functions decorated with @tool
-_tools_list = [get_crm_customer_info]
+_tools_list = [get_crm_customer_info, get_crm_customers_info]
+
+# Bind the tools once: bind_tools rebuilds a RunnableBinding and re-serializes
+# every tool's JSON schema, which doesn't belong on the per-request path
+_llm_with_tools = _chat_model.bind_tools(_tools_list) if _LLM_AVAILABLE else None
+
+# Semantic cache of full generations: on a close-enough repeat of the same
+# prompt tail (query + docs + history) the LLM call is skipped entirely.
+# Qdrant availability is checked lazily inside the cache itself on first
+# use; the embedder needs no Qdrant connection and is built unconditionally.
+_semantic_cache = SemanticLLMCache()
+_cache_embedder: Optional[CachedEmbeddings] = None
+try:
+    _cache_embedder = CachedEmbeddings(get_embedding_model())
+except Exception as e:
+    logger.warning(f"Не удалось инициализировать эмбеддер для кэша LLM: {e}")
 
-async def generator(state: AgentState) -> dict[str, Any]:
-    """Invokes the LLM to generate a response based on the current state (messages + retrieved docs).
-    Also handles potential tool calls requested by the LLM.
 
-    Args:
-        state: The current state of the agent graph.
+def _cache_key_text(
+    current_input: str,
+    retrieved_docs: Optional[List[str]],
+    history: List[BaseMessage],
+) -> str:
+    """Builds the text embedded as the semantic-cache key.
 
-    Returns:
-        A dictionary containing updates for 'generation', 'messages',
-        and 'tool_calls' keys in the state.
+    The user query carries the semantics; docs and history are folded in as
+    short hashes so a different context never matches a cached answer.
     """
-    logger.info("---NODE: generator---")
-    # --- BEGIN Force DEBUG Level for Diagnosis ---
-    logger.setLevel(logging.DEBUG)
-    # --- END Force DEBUG Level for Diagnosis ---
-    generation_text: Optional[str] = None
-    tool_calls: Optional[List[Dict]] = None # Default to None
-
-    # Check prerequisites
-    if not _LLM_AVAILABLE or _chat_model is None:
-        logger.error("Языковая модель недоступна. Невозможно сгенерировать ответ.")
-        # Update state to reflect the error - Append an AIMessage with error
-        error_message = AIMessage(content="Ошибка: Языковая модель недоступна.")
-        updated_messages = state['messages'] + [error_message]
-        return {"messages": [error_message]}
-
-    messages: List[BaseMessage] = state['messages']
-    retrieved_docs: Optional[List[str]] = state.get('retrieved_docs')
-
-    # --- BEGIN ADDED LOGGING ---
-    logger.debug(f"Generator node received retrieved_docs: {retrieved_docs}")
-    # --- END ADDED LOGGING ---
-
-    # 1. Construct Prompt Messages
-    prompt_messages: List[BaseMessage] = []
-
-    # Define formatted_docs before using it in the system prompt
-    formatted_docs = "Нет контекстных документов."
-    if retrieved_docs:
-        context_str = "\n\n--- Context Documents ---\n"
-        for i, doc in enumerate(retrieved_docs):
-            context_str += f"\nDocument {i+1}:\n{doc}\n---"
-        formatted_docs = context_str # Store the formatted string
-
-        # --- BEGIN ADDED LOGGING --- # Keep this logging
-        logger.debug(f"Formatted context string for prompt: {formatted_docs[:500]}...") # Log first 500 chars
-        # --- END ADDED LOGGING --- 
-    else:
-        logger.info("Не найдены документы для добавления в контекст запроса.")
-
-    # System Message (Role, Capabilities, Instructions)
-    system_prompt_template = (
+    docs_hash = hashlib.sha256(
+        "\n".join(retrieved_docs or []).encode()
+    ).hexdigest()[:16]
+    history_hash = hashlib.sha256(
+        "\x00".join(str(getattr(m, 'content', '')) for m in history).encode()
+    ).hexdigest()[:16]
+    return f"{current_input}||{docs_hash}||{history_hash}"
+
+# System Message (Role, Capabilities, Instructions)
+_SYSTEM_PROMPT_TEMPLATE = (
     """Ты — проактивный и компетентный ИИ-ассистент компании "АРЕАЛ". Твоя роль — быть полезным гидом в мире экологических услуг и обращения с отходами для наших клиентов и эффективным помощником для сотрудников.
 
 **Главный принцип: точность и опора на факты.** Используй предоставленные КОНТЕКСТНЫЕ ДОКУМЕНТЫ как единственный источник фактической информации об услугах, технологиях, лицензиях "АРЕАЛ". Если данных нет — не гадай, а честно скажи об этом и предложи связаться со специалистом (8 800 555 90 57).
@@ -107,114 +98,283 @@ async def generator(state: AgentState) -> dict[str, Any]:
 {formatted_docs}
 ---
 """
-    )
-    # Now format the system prompt with the defined formatted_docs
-    prompt_messages.append(SystemMessage(content=system_prompt_template.format(formatted_docs=formatted_docs)))
-
-    # Add existing conversation history loaded by the checkpointer
-    # Ensure messages is a list before extending
-    history = state.get('messages', [])
-    if isinstance(history, list):
-        prompt_messages.extend(history)
-    else:
-        logger.warning(f"'messages' in state is not a list: {type(history)}. Skipping history.")
-
-    # Add the *current* user input as the last message
-    current_input = state.get('input')
-    if current_input:
-        prompt_messages.append(HumanMessage(content=current_input))
-    else:
-        logger.warning("'input' key is missing or empty in the state. LLM might lack current context.")
-
-    # logger.debug(f"Сообщения для запроса подготовлены (количество: {len(prompt_messages)}). Последнее сообщение: {prompt_messages[-1].content[:100]}...")
-    # Improved logging for clarity
-    logger.info(
-        f"Prompt messages constructed. Total: {len(prompt_messages)}. "
-        f"Includes History: {len(history) > 0}. "
-        f"Last Message Type: {type(prompt_messages[-1]).__name__ if prompt_messages else 'None'}. "
-        f"Last Message Content: {prompt_messages[-1].content[:100] if prompt_messages else 'None'}..."
-    )
-
-    # 2. Bind Tools and Invoke LLM
+)
+
+# The template body is static: split it around the docs placeholder once so
+# per-turn construction is two string concatenations instead of re-formatting
+# the >1 KB body with .format()
+_SYSTEM_PREFIX, _SYSTEM_SUFFIX = _SYSTEM_PROMPT_TEMPLATE.split("{formatted_docs}")
+
+# The static instructions go out as their own SystemMessage whose bytes are
+# identical on every call, so provider-side prefix (KV) caching matches the
+# whole leading block; the variable docs live in a second message that starts
+# at the cache boundary. Changing docs no longer invalidates the prefix.
+_STATIC_SYSTEM_MESSAGE = SystemMessage(content=_SYSTEM_PREFIX)
+
+# Prebuilt docs-message for the common no-context branch
+_NO_DOCS_SYSTEM_MESSAGE = SystemMessage(
+    content="Нет контекстных документов." + _SYSTEM_SUFFIX
+)
+
+# Fingerprint of the static prefix, logged alongside cached-token counts so
+# cache hit rate can be correlated with prompt revisions
+_STATIC_PREFIX_HASH = hashlib.sha256(_SYSTEM_PREFIX.encode()).hexdigest()[:16]
+
+async def generator(
+    state: AgentState, config: Optional[RunnableConfig] = None
+) -> dict[str, Any]:
+    """Invokes the LLM to generate a response based on the current state (messages + retrieved docs).
+    Also handles potential tool calls requested by the LLM.
+
+    The completion is consumed as a token stream: when the caller passed an
+    asyncio.Queue as config["configurable"]["stream_queue"], each content
+    chunk is forwarded to it as it arrives (None marks end-of-stream), so the
+    transport can show partial output while the model is still generating.
+    The assembled AIMessage is returned for the state either way.
+
+    Args:
+        state: The current state of the agent graph.
+        config: Optional LangGraph run config; may carry a 'stream_queue'.
+
+    Returns:
+        A dictionary containing updates for the 'generation' and 'messages'
+        keys in the state. Tool calls requested by the LLM travel on the
+        appended AIMessage itself (AIMessage.tool_calls).
+    """
+    logger.info("---NODE: generator---")
+    generation_text: Optional[str] = None
+    # The queue is read up front and the sentinel emitted in the finally
+    # below, so every exit path — cache hit, LLM-unavailable, errors —
+    # signals end-of-stream; otherwise a consuming transport blocks forever
+    stream_queue = (config or {}).get('configurable', {}).get('stream_queue')
     try:
-        # Bind the tools to the LLM instance for this call
-        llm_with_tools = _chat_model.bind_tools(_tools_list)
-
-        # --- BEGIN ADDED DEBUG LOGGING --- 
-        actual_model_name = getattr(llm_with_tools, 'model_name', 'Attribute not found')
-        actual_api_key = getattr(llm_with_tools, 'openai_api_key', 'Attribute not found')
-        api_key_snippet = f"{actual_api_key[:5]}...{actual_api_key[-4:]}" if isinstance(actual_api_key, str) and len(actual_api_key) > 9 else actual_api_key
-        logger.debug(f"Invoking LLM. Bound Model Name: {actual_model_name}, API Key Used (snippet): {api_key_snippet}")
-        # --- END ADDED DEBUG LOGGING --- 
-
-        # Invoke the LLM with the prepared messages
-        logger.info("Вызываю LLM с инструментами...")
+        # Check prerequisites
+        if not _LLM_AVAILABLE or _llm_with_tools is None:
+            logger.error("Языковая модель недоступна. Невозможно сгенерировать ответ.")
+            # Update state to reflect the error - Append an AIMessage with error
+            error_message = AIMessage(content="Ошибка: Языковая модель недоступна.")
+            updated_messages = state['messages'] + [error_message]
+            return {"messages": [error_message]}
+
+        messages: List[BaseMessage] = state['messages']
+        retrieved_docs: Optional[List[str]] = state.get('retrieved_docs')
+        if retrieved_docs:
+            # Squeeze boilerplate/duplicates and enforce a token budget before the
+            # docs reach the prompt — prompt tokens scale cost and TTFT linearly
+            retrieved_docs = compress_docs(retrieved_docs, get_settings().OPENAI_MODEL_NAME)
+
+        # --- BEGIN ADDED LOGGING ---
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generator node received retrieved_docs: %s", retrieved_docs)
+        # --- END ADDED LOGGING ---
+
+        # 1. Construct Prompt Messages
+        prompt_messages: List[BaseMessage] = []
+
+        # Define formatted_docs before using it in the system prompt
+        formatted_docs = "Нет контекстных документов."
+        if retrieved_docs:
+            # Build once with join instead of += — string concatenation in a loop
+            # re-copies the accumulated buffer on every iteration
+            context_parts = ["\n\n--- Context Documents ---\n"]
+            context_parts.extend(
+                f"\nDocument {i+1}:\n{doc}\n---" for i, doc in enumerate(retrieved_docs)
+            )
+            formatted_docs = "".join(context_parts)
+
+            # --- BEGIN ADDED LOGGING --- # Keep this logging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Formatted context string for prompt: %s...", formatted_docs[:500]) # Log first 500 chars
+            # --- END ADDED LOGGING --- 
+        else:
+            logger.info("Не найдены документы для добавления в контекст запроса.")
+
+
+        # Static instructions first (byte-stable for prefix caching), then the
+        # context docs as a separate message
+        prompt_messages.append(_STATIC_SYSTEM_MESSAGE)
+        if retrieved_docs:
+            prompt_messages.append(SystemMessage(content=formatted_docs + _SYSTEM_SUFFIX))
+        else:
+            prompt_messages.append(_NO_DOCS_SYSTEM_MESSAGE)
+
+        # Add existing conversation history loaded by the checkpointer
+        # Ensure messages is a list before extending
+        history = state.get('messages', [])
+        if isinstance(history, list):
+            prompt_messages += history
+        else:
+            logger.warning(f"'messages' in state is not a list: {type(history)}. Skipping history.")
+            history = []
+
+        # Add the *current* user input as the last message — unless the
+        # checkpointer already appended it upstream, in which case appending
+        # again would duplicate the user's last turn in the prompt
+        current_input = state.get('input')
+        if current_input:
+            last_history_message = history[-1] if history else None
+            if (
+                isinstance(last_history_message, HumanMessage)
+                and last_history_message.content == current_input
+            ):
+                logger.debug("Текущий ввод уже является последним сообщением истории. Пропускаю дублирование.")
+            else:
+                prompt_messages.append(HumanMessage(content=current_input))
+        else:
+            logger.warning("'input' key is missing or empty in the state. LLM might lack current context.")
+
+        # logger.debug(f"Сообщения для запроса подготовлены (количество: {len(prompt_messages)}). Последнее сообщение: {prompt_messages[-1].content[:100]}...")
+        # Improved logging for clarity
+        logger.info(
+            f"Prompt messages constructed. Total: {len(prompt_messages)}. "
+            f"Includes History: {len(history) > 0}. "
+            f"Last Message Type: {type(prompt_messages[-1]).__name__ if prompt_messages else 'None'}. "
+            f"Last Message Content: {prompt_messages[-1].content[:100] if prompt_messages else 'None'}..."
+        )
+
+        # 1.5 Semantic cache lookup: a close-enough repeat of the same query with
+        # the same docs and history returns the cached answer with no LLM call
+        cache_embedding = None
+        user_role = state.get('user_role')
+        if _cache_embedder is not None and current_input:
+            try:
+                key_text = _cache_key_text(current_input, retrieved_docs, history)
+                cache_embedding = await _cache_embedder.aembed_query(key_text)
+                cached_message = await _semantic_cache.lookup(cache_embedding, user_role)
+                if cached_message is not None:
+                    return {"messages": [cached_message]}
+            except Exception as e:
+                logger.warning(f"Семантический кэш LLM недоступен для этого запроса: {e}")
+                cache_embedding = None
+
+        # 2. Invoke LLM (tools already bound at module scope)
         try:
-            # --- BEGIN DETAILED PROMPT LOGGING (DEBUG Level) --- 
-            logger.info("--- Preparing Prompt Messages for LLM ---")
-            logger.info(f"Total messages in prompt: {len(prompt_messages)}")
-            for msg in prompt_messages:
-                # Use type(msg).__name__ as .type is not standard on BaseMessage
-                msg_type = type(msg).__name__ 
-                content_repr = repr(getattr(msg, 'content', 'N/A'))[:500] # Use getattr for safety
-                logger.info(f"  - Type: {msg_type}, Content Start: {content_repr}...")
-            logger.info("--- End Prompt Messages ---")
-            # --- END DETAILED PROMPT LOGGING --- 
-
-            # logger.info(f"Sending {len(prompt_messages)} messages to LLM.") # Removed previous INFO log
-            # logger.info(f"LLM Input Messages:\n{formatted_prompt_log}") # Removed previous DEBUG log
-            response = await llm_with_tools.ainvoke(prompt_messages)
-            # Log the raw response object
-            logger.info(f"LLM Raw Response: {response}")
+            llm_with_tools = _llm_with_tools
+
+            # Diagnostic logging only when DEBUG is actually enabled: repr/str of
+            # LangChain messages walks pydantic fields and is not free on long
+            # histories
+            if logger.isEnabledFor(logging.DEBUG):
+                actual_model_name = getattr(llm_with_tools, 'model_name', 'Attribute not found')
+                actual_api_key = getattr(llm_with_tools, 'openai_api_key', 'Attribute not found')
+                api_key_snippet = f"{actual_api_key[:5]}...{actual_api_key[-4:]}" if isinstance(actual_api_key, str) and len(actual_api_key) > 9 else actual_api_key
+                logger.debug(f"Invoking LLM. Bound Model Name: {actual_model_name}, API Key Used (snippet): {api_key_snippet}")
+
+            # Invoke the LLM with the prepared messages
+            logger.info("Вызываю LLM с инструментами...")
+            try:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("--- Preparing Prompt Messages for LLM ---")
+                    logger.debug("Total messages in prompt: %d", len(prompt_messages))
+                    for msg in prompt_messages:
+                        # Use type(msg).__name__ as .type is not standard on BaseMessage
+                        msg_type = type(msg).__name__
+                        content_repr = repr(getattr(msg, 'content', 'N/A'))[:500] # Use getattr for safety
+                        logger.debug("  - Type: %s, Content Start: %s...", msg_type, content_repr)
+                    logger.debug("--- End Prompt Messages ---")
+
+                # Stream instead of awaiting the full completion: perceived
+                # latency drops to time-to-first-token, and partial output can be
+                # forwarded to the transport while generation continues
+                merged: Optional[AIMessageChunk] = None
+                async for chunk in llm_with_tools.astream(prompt_messages):
+                    # AIMessageChunk addition concatenates content and merges
+                    # tool_call_chunks into complete tool_calls
+                    merged = chunk if merged is None else merged + chunk
+                    if stream_queue is not None and chunk.content:
+                        stream_queue.put_nowait(chunk.content)
+
+                if merged is None:
+                    response: Optional[AIMessage] = None
+                else:
+                    # Re-wrap the merged chunk as a plain AIMessage for the state
+                    response = AIMessage(
+                        content=merged.content,
+                        tool_calls=merged.tool_calls,
+                        id=merged.id,
+                        response_metadata=merged.response_metadata,
+                        usage_metadata=getattr(merged, 'usage_metadata', None),
+                    )
+                # Bounded structured summary instead of repr-ing the whole
+                # response object; JSON log handlers pick up the extra fields
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "llm_raw_response",
+                        extra={
+                            "resp_id": getattr(response, 'id', None),
+                            "resp_content": str(getattr(response, 'content', ''))[:200],
+                            "resp_tool_calls": len(getattr(response, 'tool_calls', None) or []),
+                        },
+                    )
             
-            # --- BEGIN ADDED DEBUG LOGGING --- 
-            # Extract and log which model was ACTUALLY used by OpenAI
-            if hasattr(response, 'response_metadata') and 'model_name' in response.response_metadata:
-                actual_model = response.response_metadata['model_name']
-                logger.warning(f"ACTUAL MODEL USED BY OPENAI: {actual_model} (may differ from requested model)")
-            # --- END ADDED DEBUG LOGGING --- 
+                # --- BEGIN ADDED DEBUG LOGGING --- 
+                # Extract and log which model was ACTUALLY used by OpenAI
+                if hasattr(response, 'response_metadata') and 'model_name' in response.response_metadata:
+                    actual_model = response.response_metadata['model_name']
+                    logger.warning(f"ACTUAL MODEL USED BY OPENAI: {actual_model} (may differ from requested model)")
+
+                # Observe provider-side prefix cache hits for the static prompt
+                if hasattr(response, 'response_metadata'):
+                    cached_tokens = (
+                        response.response_metadata
+                        .get('prompt_tokens_details', {})
+                        .get('cached_tokens', 0)
+                    )
+                    if cached_tokens:
+                        logger.debug(
+                            f"Prefix cache: {cached_tokens} cached prompt tokens "
+                            f"(static prefix {_STATIC_PREFIX_HASH})."
+                        )
+                # --- END ADDED DEBUG LOGGING --- 
             
-            # Ensure response is AIMessage and has content
-            if not isinstance(response, AIMessage):
-                logger.error(f"LLM response is not AIMessage: {type(response)}")
-                # Handle error: maybe return a default message or raise exception
-                generation_result = AIMessage(content="Ошибка: Неожиданный формат ответа от LLM.")
-            elif not hasattr(response, 'content') or not response.content:
-                 logger.warning(f"LLM response (AIMessage) has no content: {response}")
-                 # Handle case with no content - maybe it made a tool call or refused?
-                 # For now, let's provide a generic response if no tool call either
-                 if not response.tool_calls:
-                     generation_result = AIMessage(content="Я не смог сгенерировать ответ на ваш запрос.")
-                 else:
-                     generation_result = response # Pass tool calls through
-            else:
-                 generation_result = response
+                # Ensure response is AIMessage and has content
+                if not isinstance(response, AIMessage):
+                    logger.error(f"LLM response is not AIMessage: {type(response)}")
+                    # Handle error: maybe return a default message or raise exception
+                    generation_result = AIMessage(content="Ошибка: Неожиданный формат ответа от LLM.")
+                elif not hasattr(response, 'content') or not response.content:
+                     logger.warning(f"LLM response (AIMessage) has no content: {response}")
+                     # Handle case with no content - maybe it made a tool call or refused?
+                     # For now, let's provide a generic response if no tool call either
+                     if not response.tool_calls:
+                         generation_result = AIMessage(content="Я не смог сгенерировать ответ на ваш запрос.")
+                     else:
+                         generation_result = response # Pass tool calls through
+                else:
+                     generation_result = response
+
+            except Exception as e:
+                # This block handles errors during the API call itself
+                logger.exception("Ошибка при вызове LLM или обработке ответа:")
+                # Return an error message within the expected structure
+                generation_result = AIMessage(content="Извините, произошла внутренняя ошибка при генерации ответа.")
+                # Ensure state consistency even after API error
+                updated_messages = messages + [generation_result]
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "LLM ответил. Результат (тип: %s): %s...",
+                    type(generation_result), str(generation_result)[:200]
+                )
+
+            # Tool calls requested by the LLM travel on the returned AIMessage
+            # itself; route_tools inspects the last message for them
+
+            # Cache the fresh generation (store() itself skips tool-calling
+            # responses) so an equivalent future prompt can avoid the LLM call
+            if cache_embedding is not None and isinstance(generation_result, AIMessage):
+                await _semantic_cache.store(cache_embedding, generation_result, user_role)
+
+            # Return the AIMessage in the format expected by the checkpointer for appending
+            return {"messages": [generation_result]}
 
         except Exception as e:
-            # This block handles errors during the API call itself
-            logger.exception("Ошибка при вызове LLM или обработке ответа:")
-            # Return an error message within the expected structure
-            generation_result = AIMessage(content="Извините, произошла внутренняя ошибка при генерации ответа.")
-            # Ensure state consistency even after API error
-            updated_messages = messages + [generation_result]
-            tool_calls = None # No tool calls if the API failed
-
-        logger.info(f"LLM ответил. Результат (тип: {type(generation_result)}): {str(generation_result)[:200]}...")
-
-        # Check for tool calls in the response message - This info is now *in* the returned AIMessage
-        # if isinstance(response, AIMessage) and response.tool_calls:
-        #     # ... logging ...
-        # else:
-        #     # ... logging ...
-        # tool_calls = None # No longer needed as separate return
-
-        # Return the AIMessage in the format expected by the checkpointer for appending
-        return {"messages": [generation_result]} 
-
-    except Exception as e:
-        # This block handles errors BEFORE/DURING the API call or tool binding
-        logger.error(f"Ошибка во время генерации LLM или привязки инструментов: {e}", exc_info=True)
-        # Create an error message to return
-        error_response_message = AIMessage(content="Извините, произошла ошибка при обработке вашего запроса.")
-        # Return the error message for appending to history
-        return {"messages": [error_response_message]} 
\ No newline at end of file
+            # This block handles errors BEFORE/DURING the API call or tool binding
+            logger.error(f"Ошибка во время генерации LLM или привязки инструментов: {e}", exc_info=True)
+            # Create an error message to return
+            error_response_message = AIMessage(content="Извините, произошла ошибка при обработке вашего запроса.")
+            # Return the error message for appending to history
+            return {"messages": [error_response_message]}
+    finally:
+        if stream_queue is not None:
+            stream_queue.put_nowait(None)  # end-of-stream sentinel
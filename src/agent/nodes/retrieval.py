@@ -7,42 +7,92 @@ from qdrant_client import models
 
 from src.agent.state import AgentState
 from src.config.embedding_factory import get_embedding_model
-from src.knowledge.qdrant_manager import qdrant_manager
+from src.knowledge.embedding_cache import CachedEmbeddings
+from src.knowledge.qdrant_manager import get_qdrant_manager
 
 logger = logging.getLogger(__name__)
 
-# --- Module Level Initialization --- 
+# --- Module Level Initialization ---
 
-# Check Qdrant availability
-QDRANT_AVAILABLE = qdrant_manager is not None
-if not QDRANT_AVAILABLE:
-    logger.warning(
-        "Менеджер Qdrant не инициализирован. Узел извлечения будет нефункциональным."
-    )
-
-# Initialize embedding model
+# The Qdrant manager itself is resolved lazily inside the node (it opens
+# network connections); only the embedding wrapper is built at import time.
 _embedding_model = None
 _EMBEDDING_AVAILABLE = False
-if QDRANT_AVAILABLE: # Only try to get embedder if Qdrant is available
-    try:
-        _embedding_model = get_embedding_model()
-        _EMBEDDING_AVAILABLE = _embedding_model is not None
-        if not _EMBEDDING_AVAILABLE:
-             logger.warning(
-                "Модель эмбеддингов не инициализирована. Узел извлечения будет нефункциональным."
-            )
-    except ValueError as e:
-        logger.error(f"Не удалось инициализировать модель эмбеддингов: {e}", exc_info=True)
-    except Exception as e: # Catch any other unexpected errors
-        logger.error(f"Непредвиденная ошибка при инициализации модели эмбеддингов: {e}", exc_info=True)
-
-
-def retrieve_documents(state: AgentState) -> Dict[str, Optional[List[str]]]:
+try:
+    # Query embeddings are cached (memory LRU + SQLite TTL tier) so
+    # repeated questions skip the embedding API round-trip entirely
+    _embedding_model = CachedEmbeddings(get_embedding_model())
+    _EMBEDDING_AVAILABLE = _embedding_model is not None
+    if not _EMBEDDING_AVAILABLE:
+         logger.warning(
+            "Модель эмбеддингов не инициализирована. Узел извлечения будет нефункциональным."
+        )
+except ValueError as e:
+    logger.error(f"Не удалось инициализировать модель эмбеддингов: {e}", exc_info=True)
+except Exception as e: # Catch any other unexpected errors
+    logger.error(f"Непредвиденная ошибка при инициализации модели эмбеддингов: {e}", exc_info=True)
+
+
+# Short conversational turns that never benefit from the knowledge base:
+# skipping retrieval for them saves an embedding RTT plus a Qdrant RTT
+_SMALL_TALK_WORDS = frozenset({
+    # greetings / farewells
+    "привет", "здравствуйте", "здравствуй", "добрый", "доброе", "день",
+    "утро", "вечер", "пока", "свидания", "до",
+    # acks / fillers
+    "спасибо", "благодарю", "ок", "окей", "хорошо", "понятно", "ясно",
+    "да", "нет", "ага", "угу", "ладно", "отлично", "супер",
+    "hi", "hello", "hey", "thanks", "thank", "you", "ok", "okay", "bye",
+})
+
+# Strip punctuation when normalizing words for the small-talk check
+_WORD_STRIP_CHARS = ".,!?;:()\"'«»"
+
+
+def _should_skip_retrieval(user_input: str) -> bool:
+    """
+    Cheap heuristic deciding whether the query can skip the knowledge base.
+
+    Returns True only for short messages (up to 4 words) made up entirely of
+    greeting/ack vocabulary — anything longer or containing a content word
+    goes through normal retrieval, so real questions are never affected.
+    """
+    words = user_input.lower().split()
+    if not words or len(words) > 4:
+        return False
+    return all(word.strip(_WORD_STRIP_CHARS) in _SMALL_TALK_WORDS for word in words)
+
+
+# RBAC filters memoized per role: building models.Filter runs several pydantic
+# validations, and roles are a small fixed set, so the cache stays tiny
+_FILTER_CACHE: Dict[str, models.Filter] = {}
+
+
+def _filter_for_role(user_role: str) -> models.Filter:
+    """Returns the (cached) RBAC filter matching documents allowed for the role."""
+    query_filter = _FILTER_CACHE.get(user_role)
+    if query_filter is None:
+        # Assumes 'allowed_roles' is a list of strings in Qdrant metadata
+        query_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="allowed_roles", # CORRECT KEY: Refer directly to the payload field
+                    match=models.MatchAny(any=[user_role])
+                )
+            ]
+        )
+        _FILTER_CACHE[user_role] = query_filter
+    return query_filter
+
+
+async def retrieve_documents(state: AgentState) -> Dict[str, Optional[List[str]]]:
     """
     Retrieves documents relevant to the user's input from Qdrant.
 
     Embeds the user input, constructs an RBAC filter based on the user role,
-    performs a search in Qdrant, and formats the results.
+    performs a search in Qdrant, and formats the results. Both network hops
+    (embedding API and Qdrant) run without blocking the event loop, so other
+    chats' graph invocations proceed while this one waits.
 
     Args:
         state: The current state of the agent graph.
@@ -54,8 +104,9 @@ def retrieve_documents(state: AgentState) -> Dict[str, Optional[List[str]]]:
     logger.info("---NODE: retriever---")
     retrieved_docs_list: Optional[List[str]] = None
 
-    # Check prerequisites
-    if not QDRANT_AVAILABLE or not _EMBEDDING_AVAILABLE or qdrant_manager is None or _embedding_model is None:
+    # Check prerequisites (manager is built on first use, then cached)
+    qdrant_manager = get_qdrant_manager()
+    if qdrant_manager is None or not _EMBEDDING_AVAILABLE or _embedding_model is None:
         logger.warning("Необходимые компоненты поиска недоступны (Qdrant или модель эмбеддингов). Пропускаю поиск.")
         return {"retrieved_docs": None} # Indicate failure explicitly
 
@@ -66,33 +117,31 @@ def retrieve_documents(state: AgentState) -> Dict[str, Optional[List[str]]]:
         logger.warning("В состоянии не найден пользовательский ввод. Невозможно извлечь документы.")
         return {"retrieved_docs": None}
 
+    # Small talk (greetings, acks) never needs the knowledge base — skip
+    # the embedding and Qdrant round-trips entirely
+    if _should_skip_retrieval(user_input):
+        logger.info("Запрос распознан как приветствие/подтверждение. Пропускаю поиск в базе знаний.")
+        return {"retrieved_docs": []}
+
     logger.debug(f"Ищу документы для запроса: '{user_input[:100]}...' с ролью пользователя: {user_role}")
 
     try:
-        # 1. Generate Query Embedding
-        query_embedding = _embedding_model.embed_query(user_input)
+        # 1. Generate Query Embedding (async: frees the loop during the API RTT)
+        query_embedding = await _embedding_model.aembed_query(user_input)
 
-        # 2. Construct RBAC Filter
+        # 2. Construct RBAC Filter (memoized per role)
         query_filter: Optional[models.Filter] = None
         if user_role:
             logger.debug(f"Применяю RBAC фильтр для роли: {user_role}")
-            # Assumes 'allowed_roles' is a list of strings in Qdrant metadata
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="allowed_roles", # CORRECT KEY: Refer directly to the payload field
-                        match=models.MatchAny(any=[user_role])
-                    )
-                ]
-            )
+            query_filter = _filter_for_role(user_role)
         else:
             logger.warning("Роль пользователя не указана в состоянии. Выполняю поиск без RBAC фильтрации.")
 
-        # 3. Search Qdrant
-        search_results = qdrant_manager.search(
+        # 3. Search Qdrant (async gRPC call: no worker thread, and the event
+        # loop is free while Qdrant works; limit/threshold come from settings)
+        search_results = await qdrant_manager.search(
             query_vector=query_embedding,
             query_filter=query_filter,
-            limit=5 # Configurable limit
         )
 
         # 4. Process Results
@@ -108,9 +157,9 @@ def retrieve_documents(state: AgentState) -> Dict[str, Optional[List[str]]]:
                 # Simple formatting, can be customized
                 formatted_doc = f"Источник: {source}\nСодержимое: {content}"
                 retrieved_docs_list.append(formatted_doc)
-            logger.info(f"Найдено {len(retrieved_docs_list)} документов (без порога). Scores: {scores}")
+            logger.info(f"Найдено {len(retrieved_docs_list)} документов. Scores: {scores}")
         else:
-            logger.info("Не найдено документов, соответствующих запросу и фильтрам (порог отключен).")
+            logger.info("Не найдено документов, соответствующих запросу, фильтрам и порогу score.")
             retrieved_docs_list = [] # Return empty list if no results
 
     except Exception as e:
@@ -1,38 +1,93 @@
 """Node for executing tools called by the LLM."""
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple, Type
 
 # ToolMessage is used to structure the output of tool calls for the LLM
 from langchain_core.messages import ToolMessage, BaseMessage
+from pydantic import BaseModel
 
 from src.agent.state import AgentState
 # Import the actual tool functions that can be called
-from src.tools.crm_tools import get_crm_customer_info
+from src.tools.crm_tools import get_crm_customer_info, get_crm_customers_info
 
 logger = logging.getLogger(__name__)
 
-# --- Tool Mapping --- 
-
-# Map tool names (as the LLM knows them) to their actual functions
-# Ensure the names match how the LLM is expected to call them (often the function name)
-_tool_map: Dict[str, Callable[..., Any]] = {
-    "get_crm_customer_info": get_crm_customer_info,
-    # Add other tool functions here as they are created
-    # "another_tool_name": another_tool_function,
+# --- Tool Mapping ---
+
+# Map tool names (as the LLM knows them) to (raw function, args schema) pairs
+# unwrapped from the @tool StructuredTool at import time: one explicit pydantic
+# validation per call instead of the tool wrapper's full dispatch machinery
+_tool_map: Dict[str, Tuple[Callable[..., Any], Type[BaseModel]]] = {
+    # Async tools expose the raw coroutine as .coroutine, sync ones as .func
+    "get_crm_customer_info": (
+        get_crm_customer_info.coroutine or get_crm_customer_info.func,
+        get_crm_customer_info.args_schema,
+    ),
+    "get_crm_customers_info": (
+        get_crm_customers_info.coroutine or get_crm_customers_info.func,
+        get_crm_customers_info.args_schema,
+    ),
+    # Add other tools here as they are created
+    # "another_tool_name": (another_tool.coroutine or another_tool.func, another_tool.args_schema),
 }
 
 # --- Node Function --- 
 
-def execute_tools(state: AgentState) -> Dict[str, List[BaseMessage]]:
+async def _run_one(tool_call: Dict[str, Any]) -> ToolMessage:
+    """
+    Executes a single tool call and wraps the result (or error) in a ToolMessage.
+
+    Coroutine tools are awaited directly; sync tools (blocking CRM HTTP calls)
+    are offloaded to a worker thread so they don't stall the event loop.
+    """
+    tool_name = tool_call.get('name')
+    tool_args = tool_call.get('args', {})
+    tool_call_id = tool_call.get('id')
+
+    logger.info(f"Attempting to execute tool: {tool_name} with args: {tool_args} (ID: {tool_call_id})")
+
+    tool_entry = _tool_map.get(tool_name)
+
+    if not tool_entry:
+        logger.error(f"Tool '{tool_name}' not found in tool map.")
+        # Report that the tool wasn't found
+        return ToolMessage(
+            content=f"Error: Tool '{tool_name}' not found.",
+            tool_call_id=tool_call_id
+        )
+
+    raw_fn, args_schema = tool_entry
+
+    try:
+        # Validate LLM-provided args once against the schema, then call the
+        # raw function directly — skips the StructuredTool wrapper dispatch
+        validated_args = args_schema.model_validate(tool_args).model_dump()
+        if asyncio.iscoroutinefunction(raw_fn):
+            output = await raw_fn(**validated_args)
+        else:
+            output = await asyncio.to_thread(raw_fn, **validated_args)
+        logger.info(f"Tool '{tool_name}' executed successfully. Output: {str(output)[:100]}...")
+        return ToolMessage(content=str(output), tool_call_id=tool_call_id)
+    except Exception as e:
+        logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
+        # Report the error back to the LLM
+        error_content = f"Error executing tool '{tool_name}': {type(e).__name__} - {e}"
+        return ToolMessage(content=error_content, tool_call_id=tool_call_id)
+
+
+async def execute_tools(state: AgentState) -> Dict[str, List[BaseMessage]]:
     """
     Executes the tools requested by the LLM in the previous step.
 
-    Retrieves tool calls from the state, executes the corresponding functions
-    using the provided arguments, and formats the results as ToolMessage objects.
+    Reads the tool calls from the last AIMessage in the state, runs them
+    concurrently (tool calls are I/O-bound CRM lookups, so total latency is
+    the slowest call rather than the sum), and formats the results as
+    ToolMessage objects.
 
     Args:
-        state: The current state of the agent graph, containing potential tool_calls.
+        state: The current state of the agent graph.
 
     Returns:
         A dictionary containing the update for the 'messages' key in the state.
@@ -41,50 +96,28 @@ def execute_tools(state: AgentState) -> Dict[str, List[BaseMessage]]:
         Returns an empty dictionary if no tool calls were present.
     """
     logger.info("---NODE: tool_executor---")
-    tool_calls = state.get('tool_calls')
+    messages = state.get('messages') or []
+    last_message = messages[-1] if messages else None
+    tool_calls = getattr(last_message, 'tool_calls', None)
 
     if not tool_calls:
         logger.info("No tool calls to execute.")
         # If no tools to run, return no state updates (implicitly keeps existing messages)
-        # Returning {"messages": state['messages']} would also work but is redundant
         return {} # No changes to messages if no tools called
 
-    tool_outputs: List[BaseMessage] = []
+    # Calls without an ID can't be matched back to the LLM request; skip them
+    valid_calls = []
     for tool_call in tool_calls:
-        tool_name = tool_call.get('name')
-        tool_args = tool_call.get('args', {})
-        tool_call_id = tool_call.get('id') # Crucial for matching output to call
-
-        if not tool_call_id:
+        if not tool_call.get('id'):
             logger.error(f"Tool call missing required 'id'. Skipping: {tool_call}")
-            continue # Skip calls without an ID
-
-        logger.info(f"Attempting to execute tool: {tool_name} with args: {tool_args} (ID: {tool_call_id})")
-
-        tool_function = _tool_map.get(tool_name)
-
-        if tool_function:
-            try:
-                # Execute the tool function with the arguments provided by the LLM
-                output = tool_function(**tool_args)
-                logger.info(f"Tool '{tool_name}' executed successfully. Output: {str(output)[:100]}...")
-                tool_outputs.append(
-                    ToolMessage(content=str(output), tool_call_id=tool_call_id)
-                )
-            except Exception as e:
-                logger.error(f"Error executing tool '{tool_name}': {e}", exc_info=True)
-                # Report the error back to the LLM
-                error_content = f"Error executing tool '{tool_name}': {type(e).__name__} - {e}"
-                tool_outputs.append(
-                    ToolMessage(content=error_content, tool_call_id=tool_call_id)
-                )
-        else:
-            logger.error(f"Tool '{tool_name}' not found in tool map.")
-            # Report that the tool wasn't found
-            error_content = f"Error: Tool '{tool_name}' not found."
-            tool_outputs.append(
-                ToolMessage(content=error_content, tool_call_id=tool_call_id)
-            )
+            continue
+        valid_calls.append(tool_call)
+
+    # Run all tool calls concurrently; _run_one converts failures to
+    # error ToolMessages so gather preserves one result per call, in order
+    tool_outputs: List[BaseMessage] = list(
+        await asyncio.gather(*(_run_one(tool_call) for tool_call in valid_calls))
+    )
 
     # Return the list of ToolMessages to be appended to the state's messages list
     # LangGraph automatically merges list updates for keys like 'messages'
@@ -25,8 +25,6 @@ class AgentState(TypedDict):
         retrieved_docs: Documents fetched from the knowledge base relevant to the input.
                         List of strings, where each string is the content of a chunk.
         generation: The raw text response generated by the language model.
-        tool_calls: Parsed tool calls requested by the LLM (if any).
-                    Often a list of dicts with 'name', 'args', and 'id'.
         tool_outputs: The results obtained after executing the requested tools.
                       The structure depends on the specific tool's return value.
         intermediate_steps: A list storing the sequence of actions (tool calls)
@@ -38,9 +36,8 @@ class AgentState(TypedDict):
     user_role: Optional[str]          # Added for RBAC filtering during retrieval
     retrieved_docs: Optional[List[str]]
     generation: Optional[str]
-    # Standard LangChain tool calling structure often yields dicts
-    # Can be replaced with List[ToolCall] if using Pydantic ToolCall model
-    tool_calls: Optional[List[Dict[str, Any]]]
+    # Tool calls requested by the LLM live on the last AIMessage in 'messages'
+    # (AIMessage.tool_calls) — no separate state channel for them to persist
     tool_outputs: Optional[List[Any]] # Can be List[ToolMessage] or other structures
     # Classic LangChain agent intermediate steps format
     intermediate_steps: Optional[List[Tuple[Any, Any]]] # Typically AgentAction, observation 
\ No newline at end of file
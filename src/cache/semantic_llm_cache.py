@@ -0,0 +1,146 @@
+"""Semantic cache for LLM generations, backed by a dedicated Qdrant collection.
+
+On a hit (cosine similarity above threshold, same user role, entry not
+expired) the generator can return the cached answer and skip the LLM call —
+the single most expensive operation in the graph. Entries with tool calls are
+never cached, since tool results vary between runs.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage
+from qdrant_client import models
+
+from src.knowledge.qdrant_manager import get_qdrant_manager
+
+logger = logging.getLogger(__name__)
+
+# Kept separate from the knowledge-base collection
+_CACHE_COLLECTION = "llm_cache"
+
+
+class SemanticLLMCache:
+    """Looks up and stores generated answers keyed by a prompt-tail embedding."""
+
+    def __init__(self, similarity_threshold: float = 0.97, ttl: float = 3600.0) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self._collection_ready = False
+        # Resolved lazily on first use so constructing the cache (at module
+        # import in the generator) never opens a Qdrant connection
+        self._manager = None
+
+    def _ensure_collection(self, vector_size: int) -> bool:
+        """Creates the cache collection on first use; returns readiness."""
+        if self._collection_ready:
+            return True
+        if self._manager is None:
+            self._manager = get_qdrant_manager()
+            if self._manager is None:
+                logger.warning(
+                    "Менеджер Qdrant недоступен. Семантический кэш LLM отключен."
+                )
+                return False
+        try:
+            if not self._manager.client.collection_exists(_CACHE_COLLECTION):
+                self._manager.client.create_collection(
+                    collection_name=_CACHE_COLLECTION,
+                    vectors_config=models.VectorParams(
+                        size=vector_size, distance=models.Distance.COSINE
+                    ),
+                )
+                logger.info(f"Создана коллекция семантического кэша '{_CACHE_COLLECTION}'.")
+            self._collection_ready = True
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось подготовить коллекцию кэша LLM: {e}")
+            return False
+
+    async def lookup(
+        self, embedding: List[float], user_role: Optional[str]
+    ) -> Optional[AIMessage]:
+        """Returns a cached AIMessage for a sufficiently similar prompt, or None.
+
+        Role is matched exactly so answers never leak across RBAC boundaries;
+        expired entries are treated as misses.
+        """
+        if not self._ensure_collection(len(embedding)):
+            return None
+
+        role_key = user_role or ""
+        try:
+            query_filter = models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="user_role", match=models.MatchValue(value=role_key)
+                    )
+                ]
+            )
+            # The manager's client is sync; keep the event loop free
+            hits = await asyncio.to_thread(
+                self._manager.client.search,
+                collection_name=_CACHE_COLLECTION,
+                query_vector=embedding,
+                query_filter=query_filter,
+                limit=1,
+                score_threshold=self.similarity_threshold,
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка поиска в семантическом кэше LLM: {e}")
+            return None
+
+        if not hits:
+            return None
+
+        payload = hits[0].payload or {}
+        created_at = payload.get("created_at", 0)
+        if time.time() - created_at > self.ttl:
+            return None
+
+        content = payload.get("content")
+        if not content:
+            return None
+
+        logger.info(
+            f"Семантический кэш LLM: попадание (score={hits[0].score:.4f}). "
+            f"Пропускаю вызов LLM."
+        )
+        return AIMessage(content=content)
+
+    async def store(
+        self,
+        embedding: List[float],
+        ai_message: AIMessage,
+        user_role: Optional[str],
+    ) -> None:
+        """Caches a generated answer; tool-calling responses are skipped."""
+        if not self._ensure_collection(len(embedding)):
+            return
+        if getattr(ai_message, "tool_calls", None):
+            return  # Tool outputs vary between runs; caching them is unsafe
+        if not ai_message.content:
+            return
+
+        try:
+            await asyncio.to_thread(
+                self._manager.client.upsert,
+                collection_name=_CACHE_COLLECTION,
+                points=[
+                    models.PointStruct(
+                        id=os.urandom(16).hex(),
+                        vector=embedding,
+                        payload={
+                            "content": ai_message.content,
+                            "user_role": user_role or "",
+                            "created_at": time.time(),
+                        },
+                    )
+                ],
+                wait=False,
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка записи в семантический кэш LLM: {e}")
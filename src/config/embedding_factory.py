@@ -7,7 +7,8 @@ from langchain_openai import OpenAIEmbeddings
 # Placeholder for HuggingFace - uncomment and install `langchain-community` if needed
 # from langchain_community.embeddings import HuggingFaceEmbeddings
 
-from src.config.settings import settings
+from src.config.http_clients import shared_async_client, shared_sync_client
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ def get_embedding_model() -> Embeddings:
                     API key/model name for the provider is missing, or if the
                     HuggingFace provider is selected without the necessary library.
     """
+    settings = get_settings()
     provider = settings.EMBEDDING_PROVIDER.lower()
     logger.info(f"Attempting to configure embedding model for provider: {provider}")
 
@@ -42,6 +44,10 @@ def get_embedding_model() -> Embeddings:
         return OpenAIEmbeddings(
             model=settings.OPENAI_EMBEDDING_MODEL_NAME,
             api_key=settings.OPENAI_API_KEY,
+            # Shared HTTP/2 clients: aembed_query runs on the event loop
+            # without blocking, and TLS connections are reused across calls
+            http_client=shared_sync_client,
+            http_async_client=shared_async_client,
             # Add other parameters like dimensions if needed/supported
         )
 
@@ -0,0 +1,18 @@
+"""Shared httpx clients for all outbound OpenAI-compatible API calls.
+
+One multiplexed HTTP/2 TLS connection is reused across chat, embedding and
+any other API requests instead of a best-effort per-call pool, eliminating
+repeated TLS handshakes under concurrency.
+"""
+
+import httpx
+
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+shared_async_client = httpx.AsyncClient(
+    http2=True, timeout=_HTTP_TIMEOUT, limits=_HTTP_LIMITS
+)
+shared_sync_client = httpx.Client(
+    http2=True, timeout=_HTTP_TIMEOUT, limits=_HTTP_LIMITS
+)
@@ -6,7 +6,8 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 
-from src.config.settings import settings
+from src.config.http_clients import shared_async_client, shared_sync_client
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ def get_chat_model() -> BaseChatModel:
         ValueError: If the configured provider is unsupported or if the
                     required API key for the provider is missing.
     """
+    settings = get_settings()
     provider = settings.LLM_PROVIDER.lower()
     logger.info(f"Attempting to configure chat model for provider: {provider}")
 
@@ -36,7 +38,9 @@ def get_chat_model() -> BaseChatModel:
         logger.info(f"Using OpenAI model: {settings.OPENAI_MODEL_NAME}")
         return ChatOpenAI(
             model=settings.OPENAI_MODEL_NAME,
-            api_key=settings.OPENAI_API_KEY
+            api_key=settings.OPENAI_API_KEY,
+            http_client=shared_sync_client,
+            http_async_client=shared_async_client
             # temperature=0 # Removed for compatibility with older models
             # Add other parameters like max_tokens if needed
         )
@@ -1,9 +1,46 @@
 """Loads application settings from environment variables and .env file."""
 
 import os
-from typing import Optional
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Optional, Tuple, Type
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+import orjson
+from pydantic.fields import FieldInfo
+from pydantic_settings import (
+    BaseSettings,
+    EnvSettingsSource,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+)
+
+_ENV_FILE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
+
+
+@lru_cache(maxsize=1)
+def _dotenv_values() -> Dict[str, str]:
+    """Parses the .env file once, for lazily-resolved optional fields."""
+    from dotenv import dotenv_values
+    return {k: v for k, v in dotenv_values(_ENV_FILE_PATH).items() if v is not None}
+
+
+def _lazy_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Resolves an optional variable from the environment or .env on demand."""
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+    return _dotenv_values().get(name, default)
+
+
+class _OrjsonEnvSource(EnvSettingsSource):
+    """Environment source that decodes JSON-valued variables with orjson.
+
+    pydantic-settings parses complex (list/dict-typed) environment variables
+    with stdlib json; orjson does the same job faster and is already a
+    project dependency. A no-op while all fields are scalars.
+    """
+
+    def decode_complex_value(self, field_name: str, field: FieldInfo, value: Any) -> Any:
+        return orjson.loads(value)
 
 
 class Settings(BaseSettings):
@@ -23,7 +60,13 @@ class Settings(BaseSettings):
         QDRANT_PORT: Port number for the Qdrant vector database.
         QDRANT_API_KEY: Optional API key for Qdrant Cloud.
         QDRANT_COLLECTION_NAME: Name of the collection within Qdrant.
+        QDRANT_TOP_K: Maximum number of documents returned per search.
+        QDRANT_SCORE_THRESHOLD: Minimum similarity score for search results.
         TELEGRAM_BOT_TOKEN: Authentication token for the Telegram bot.
+        TELEGRAM_WEBHOOK_URL: Public base URL for webhook mode (polling if unset).
+        TELEGRAM_WEBHOOK_LISTEN: Interface to bind the webhook server to.
+        TELEGRAM_WEBHOOK_PORT: Port for the webhook server.
+        EMPLOYEE_IDS: Comma-separated Telegram user IDs with the employee role.
         WHATSAPP_TOKEN: Optional token for WhatsApp Business API.
         WHATSAPP_PHONE_NUMBER_ID: Optional WhatsApp phone number ID.
         WHATSAPP_VERIFY_TOKEN: Optional token for WhatsApp webhook verification.
@@ -37,13 +80,12 @@ class Settings(BaseSettings):
         LANGCHAIN_API_KEY: Optional API key for LangSmith.
         LANGCHAIN_PROJECT: Optional project name for LangSmith.
         LOG_LEVEL: Logging level for the application (e.g., "INFO", "DEBUG").
+        LOG_FORMAT: Log output format, "text" or "json".
     """
     # --- LLM Configuration ---
     LLM_PROVIDER: str = "openai"
     OPENAI_API_KEY: str
     OPENAI_MODEL_NAME: str = "o3-mini"
-    ANTHROPIC_API_KEY: Optional[str] = None
-    ANTHROPIC_MODEL_NAME: Optional[str] = "claude-3-5-sonnet-20240620"
 
     # --- Embedding Model Configuration ---
     EMBEDDING_PROVIDER: str = "openai"
@@ -55,12 +97,18 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     QDRANT_API_KEY: Optional[str] = None
     QDRANT_COLLECTION_NAME: str = "knowledge_base"
+    QDRANT_TOP_K: int = 5
+    QDRANT_SCORE_THRESHOLD: float = 0.3
 
     # --- Messengers ---
     TELEGRAM_BOT_TOKEN: str
-    WHATSAPP_TOKEN: Optional[str] = None
-    WHATSAPP_PHONE_NUMBER_ID: Optional[str] = None
-    WHATSAPP_VERIFY_TOKEN: Optional[str] = None
+    # When TELEGRAM_WEBHOOK_URL is set the bot serves pushed updates on
+    # LISTEN:PORT instead of long-polling getUpdates
+    TELEGRAM_WEBHOOK_URL: Optional[str] = None
+    TELEGRAM_WEBHOOK_LISTEN: str = "0.0.0.0"
+    TELEGRAM_WEBHOOK_PORT: int = 8443
+    # Comma-separated Telegram user IDs treated as employees for RBAC
+    EMPLOYEE_IDS: str = ""
 
     # --- CRM Configuration ---
     CRM_PROVIDER: str = "amocrm"
@@ -73,21 +121,85 @@ class Settings(BaseSettings):
 
     # --- LangSmith (Optional but Recommended) ---
     LANGCHAIN_TRACING_V2: bool = True
-    LANGCHAIN_ENDPOINT: Optional[str] = "https://api.smith.langchain.com"
-    LANGCHAIN_API_KEY: Optional[str] = None
-    LANGCHAIN_PROJECT: Optional[str] = "AI_Customer_Service_Agent"
 
     # --- Application Settings ---
     LOG_LEVEL: str = "DEBUG"
+    LOG_FORMAT: str = "text"  # "text" or "json" (orjson-backed structured logs)
 
+    # No env_file here: the .env is loaded into os.environ once at process
+    # entry (load_dotenv in main/scripts), so pydantic-settings only reads
+    # the C-level os.environ dict instead of re-parsing the file per
+    # Settings() construction
+    # frozen=True: the singleton is shared across every async task (and any
+    # future worker threads); an immutable model makes that sharing safe and
+    # lets pydantic skip validate_assignment machinery. Flat field names are
+    # kept on purpose — they mirror the environment variable names 1:1.
     model_config = SettingsConfigDict(
-        env_file=os.path.join(os.path.dirname(__file__), '..', '..', '.env'), # Construct path to root .env
-        env_file_encoding='utf-8',
-        extra='ignore' # Ignore extra fields from .env
+        frozen=True,
+        extra='ignore' # Ignore extra fields from the environment
     )
 
-# Create a single instance of the settings to be imported by other modules
-settings = Settings()
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        """Swaps the default environment source for the orjson-backed one."""
+        return (init_settings, _OrjsonEnvSource(settings_cls), file_secret_settings)
+
+    # --- Optional provider fields, resolved lazily ---
+    # These belong to providers a deployment may never enable (a
+    # Telegram+AmoCRM-only process never touches WhatsApp or Anthropic), so
+    # they are looked up on first attribute access instead of being resolved
+    # eagerly for every Settings() construction; cached_property then pins
+    # the value for the lifetime of the instance.
+
+    @cached_property
+    def ANTHROPIC_API_KEY(self) -> Optional[str]:
+        return _lazy_env("ANTHROPIC_API_KEY")
+
+    @cached_property
+    def ANTHROPIC_MODEL_NAME(self) -> Optional[str]:
+        return _lazy_env("ANTHROPIC_MODEL_NAME", "claude-3-5-sonnet-20240620")
+
+    @cached_property
+    def WHATSAPP_TOKEN(self) -> Optional[str]:
+        return _lazy_env("WHATSAPP_TOKEN")
+
+    @cached_property
+    def WHATSAPP_PHONE_NUMBER_ID(self) -> Optional[str]:
+        return _lazy_env("WHATSAPP_PHONE_NUMBER_ID")
+
+    @cached_property
+    def WHATSAPP_VERIFY_TOKEN(self) -> Optional[str]:
+        return _lazy_env("WHATSAPP_VERIFY_TOKEN")
+
+    @cached_property
+    def LANGCHAIN_ENDPOINT(self) -> Optional[str]:
+        return _lazy_env("LANGCHAIN_ENDPOINT", "https://api.smith.langchain.com")
+
+    @cached_property
+    def LANGCHAIN_API_KEY(self) -> Optional[str]:
+        return _lazy_env("LANGCHAIN_API_KEY")
+
+    @cached_property
+    def LANGCHAIN_PROJECT(self) -> Optional[str]:
+        return _lazy_env("LANGCHAIN_PROJECT", "AI_Customer_Service_Agent")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Returns the application settings singleton, created on first call.
+
+    Lazy construction defers the .env parsing and environment scanning that
+    Settings() performs until a caller actually needs configuration, and
+    lru_cache guarantees it happens exactly once per process.
+    """
+    return Settings()
 
 # Optional: Add a simple check to ensure critical secrets are loaded
 # if not settings.OPENAI_API_KEY:
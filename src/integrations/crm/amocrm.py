@@ -1,14 +1,47 @@
 """Concrete implementation of the CRMWrapper for AmoCRM."""
 
+import asyncio
 import logging
-import requests
-from typing import Dict, Any, Optional
+import httpx
+import orjson
+from cachetools import TTLCache
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from .base import CRMWrapper
-from src.config.settings import settings
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Constant error strings hoisted to module scope — no per-exception formatting
+_ERR_AUTH = "Ошибка CRM API: Ошибка аутентификации."
+_ERR_TIMEOUT = "Ошибка подключения к CRM: Истекло время ожидания запроса."
+
+# API path prefix; per-call URLs are built with plain concatenation
+_CONTACTS_PATH = "/api/v4/contacts/"
+
+# One pre-bound tuple for network-level failures keeps the except ladder at
+# two clauses (HTTP status vs transport); timeouts are told apart inside
+_NET_EXCS = (httpx.TimeoutException, httpx.RequestError)
+
+# Cap on simultaneous in-flight requests for batched contact fetches
+_BATCH_CONCURRENCY = 10
+
+# Known HTTP statuses dispatch through one dict lookup instead of an
+# if/elif cascade: status -> (log method, log template, reply template).
+# Templates take the contact ID via {id}; new statuses just add an entry.
+_HTTP_ERROR_MAP: Dict[int, Tuple[Callable[[str], None], str, str]] = {
+    401: (
+        logger.error,
+        "Ошибка API AmoCRM (401): Не авторизован. Проверьте API ключ.",
+        _ERR_AUTH,
+    ),
+    404: (
+        logger.warning,
+        "Контакт AmoCRM с ID {id} не найден (404).",
+        "Ошибка CRM: Клиент с ID {id} не найден.",
+    ),
+}
+
 
 class AmoCRMAdapter(CRMWrapper):
     """Adapter for interacting with the AmoCRM v4 API."""
@@ -18,9 +51,22 @@ class AmoCRMAdapter(CRMWrapper):
 
         Logs a warning if essential configuration (API key, base URL) is missing.
         """
+        settings = get_settings()
         self.api_key: Optional[str] = settings.AMO_CRM_API_KEY
         self.base_url: Optional[str] = settings.AMO_CRM_BASE_URL
         self.is_configured: bool = bool(self.api_key and self.base_url)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Repeated tool calls in one conversation often re-fetch the same
+        # contact; a short TTL keeps hits fresh while skipping the HTTP
+        # round-trip entirely. Only successful payloads are cached.
+        self._cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+        # api_key is immutable for the adapter's lifetime, so the auth
+        # headers are built exactly once
+        self._headers: Dict[str, str] = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        } if self.is_configured else {}
 
         if not self.is_configured:
             logger.warning(
@@ -31,22 +77,26 @@ class AmoCRMAdapter(CRMWrapper):
             # Remove trailing slash from base_url if present
             if self.base_url.endswith('/'):
                 self.base_url = self.base_url[:-1]
+
+            # Async pooled client: non-blocking I/O lets concurrent chats
+            # overlap CRM waits on one event loop, keep-alive connections skip
+            # the TCP + TLS handshake after the first call, and HTTP/2
+            # multiplexes requests over a single connection
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(15.0, connect=3.0),
+                limits=httpx.Limits(max_keepalive_connections=20),
+                http2=True,
+            )
             logger.info("AmoCRMAdapter успешно инициализирован.")
 
     @property
     def headers(self) -> Dict[str, str]:
-        """Constructs the necessary authentication headers."""
-        if not self.api_key:
-            # This should ideally not be reached if is_configured is checked,
-            # but provides an extra layer of safety.
-            return {}
-        return {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
+        """Returns the authentication headers (built once in __init__)."""
+        return self._headers
 
-    def get_customer_info(self, customer_id: str) -> Optional[Dict[str, Any]] | str:
+    async def get_customer_info(self, customer_id: str) -> Optional[Dict[str, Any]] | str:
         """
         Fetches contact information from AmoCRM using the v4 API.
 
@@ -58,55 +108,95 @@ class AmoCRMAdapter(CRMWrapper):
             an error message string if not found or an API error occurs,
             or None if the adapter is not configured.
         """
-        if not self.is_configured:
+        # _client is only ever built when the adapter is fully configured, so
+        # this single check subsumes the old is_configured/assert guards
+        if self._client is None:
             logger.error("AmoCRMAdapter не настроен. Невозможно получить информацию о клиенте.")
             return None # Return None to indicate configuration issue
 
-        # Assert base_url is not None due to is_configured check
-        assert self.base_url is not None
+        cached = self._cache.get(customer_id)
+        if cached is not None:
+            logger.debug(f"Данные контакта AmoCRM {customer_id} взяты из кэша.")
+            return cached
 
         # Consider adding query parameters like ?with=leads,contacts if needed
-        api_url = f"{self.base_url}/api/v4/contacts/{customer_id}"
-
         try:
-            response = requests.get(api_url, headers=self.headers, timeout=15)
-            response.raise_for_status()  # Raises HTTPError for bad responses (4xx or 5xx)
+            response = await self._client.get(_CONTACTS_PATH + customer_id)
+            response.raise_for_status()  # Raises HTTPStatusError for bad responses (4xx or 5xx)
 
-            customer_data = response.json()
+            # orjson parses the raw bytes directly — several times faster than
+            # stdlib json on nested custom_fields_values payloads, and skips
+            # charset sniffing on .text
+            customer_data = orjson.loads(response.content)
             logger.info(f"Успешно получена информация для контакта AmoCRM с ID: {customer_id}")
+            self._cache[customer_id] = customer_data
             return customer_data
 
-        except requests.exceptions.HTTPError as http_err:
+        except httpx.HTTPStatusError as http_err:
             status_code = http_err.response.status_code
-            if status_code == 401: # Unauthorized
-                 logger.error(
-                    f"Ошибка API AmoCRM ({status_code}): Не авторизован. Проверьте API ключ.",
-                    exc_info=True
-                 )
-                 return "Ошибка CRM API: Ошибка аутентификации."
-            elif status_code == 404: # Not Found
-                logger.warning(f"Контакт AmoCRM с ID {customer_id} не найден (404).", exc_info=False)
-                return f"Ошибка CRM: Клиент с ID {customer_id} не найден."
-            else:
-                logger.error(
-                    f"Ошибка HTTP API AmoCRM ({status_code}): {http_err.response.text}",
-                    exc_info=True
-                )
-                return f"Ошибка CRM API: Получен статус {status_code}."
-
-        except requests.exceptions.Timeout:
-            logger.error(f"Запрос к API AmoCRM истек по времени для контакта с ID {customer_id}.", exc_info=True)
-            return "Ошибка подключения к CRM: Истекло время ожидания запроса."
-
-        except requests.exceptions.RequestException as req_err:
-            logger.error(f"Запрос к API AmoCRM не выполнен: {req_err}", exc_info=True)
-            return f"Ошибка подключения к CRM: {req_err}."
+            # Tracebacks only at DEBUG: logging formats exc_info eagerly, and
+            # traceback.format_exception CPU adds up during error bursts
+            entry = _HTTP_ERROR_MAP.get(status_code)
+            if entry is not None:
+                log_method, log_template, reply_template = entry
+                log_method(log_template.format(id=customer_id))
+                if log_method == logger.error:
+                    logger.debug("Traceback HTTP ошибки AmoCRM:", exc_info=True)
+                return reply_template.format(id=customer_id)
+
+            logger.error(f"Ошибка HTTP API AmoCRM ({status_code}): {http_err.response.text}")
+            logger.debug("Traceback HTTP ошибки AmoCRM:", exc_info=True)
+            return f"Ошибка CRM API: Получен статус {status_code}."
+
+        except _NET_EXCS as net_err:
+            if isinstance(net_err, httpx.TimeoutException):
+                logger.error(f"Запрос к API AmoCRM истек по времени для контакта с ID {customer_id}.")
+                return _ERR_TIMEOUT
+            logger.error(f"Запрос к API AmoCRM не выполнен: {net_err}")
+            logger.debug("Traceback сетевой ошибки AmoCRM:", exc_info=True)
+            return f"Ошибка подключения к CRM: {net_err}."
 
         except Exception as e:
             # Catch unexpected errors during request or JSON parsing
-            logger.error(f"Непредвиденная ошибка при получении данных контакта AmoCRM {customer_id}: {e}", exc_info=True)
+            logger.error(f"Непредвиденная ошибка при получении данных контакта AmoCRM {customer_id}: {e}")
+            logger.debug("Traceback непредвиденной ошибки AmoCRM:", exc_info=True)
             return f"Ошибка CRM: Произошла непредвиденная ошибка ({type(e).__name__})."
 
-    # --- Implement other methods like create_lead here ---
+    async def get_customers_info(
+        self, customer_ids: List[str]
+    ) -> List[Optional[Dict[str, Any]] | str]:
+        """
+        Fetches several contacts concurrently over the shared HTTP client.
+
+        Requests overlap on the event loop (aggregate latency is roughly the
+        slowest single call, not the sum), with a semaphore capping in-flight
+        requests so a long ID list cannot flood the AmoCRM API.
+
+        Args:
+            customer_ids: IDs of the contacts to fetch.
+
+        Returns:
+            A list of per-ID results in input order; each element follows the
+            get_customer_info contract (dict, error string, or None).
+        """
+        semaphore = asyncio.Semaphore(_BATCH_CONCURRENCY)
+
+        async def _one(customer_id: str):
+            # Delegating to get_customer_info keeps the TTL cache and the
+            # per-status error messages identical to single-contact fetches
+            async with semaphore:
+                return await self.get_customer_info(customer_id)
+
+        return list(await asyncio.gather(*(_one(cid) for cid in customer_ids)))
 
-# </rewritten_file> 
\ No newline at end of file
+    def invalidate(self, customer_id: str) -> None:
+        """Drops a cached contact, e.g. after a future update_contact call."""
+        self._cache.pop(customer_id, None)
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP client (call on application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            logger.info("HTTP клиент AmoCRMAdapter закрыт.")
+
+    # --- Implement other methods like create_lead here ---
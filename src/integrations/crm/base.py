@@ -1,7 +1,7 @@
 """Defines the abstract base class for CRM integration wrappers."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class CRMWrapper(ABC):
@@ -15,10 +15,13 @@ class CRMWrapper(ABC):
     """
 
     @abstractmethod
-    def get_customer_info(self, customer_id: str) -> Optional[Dict[str, Any]] | str:
+    async def get_customer_info(self, customer_id: str) -> Optional[Dict[str, Any]] | str:
         """
         Fetches customer/contact information by their CRM ID.
 
+        Coroutine so that adapters can use non-blocking HTTP clients — tool
+        calls run on the agent's event loop and must not stall it.
+
         Args:
             customer_id: The unique identifier of the customer/contact in the CRM.
 
@@ -29,6 +32,28 @@ class CRMWrapper(ABC):
         """
         pass
 
+    async def get_customers_info(
+        self, customer_ids: List[str]
+    ) -> List[Optional[Dict[str, Any]] | str]:
+        """
+        Fetches several customers by ID, preserving input order.
+
+        The default implementation awaits get_customer_info sequentially;
+        adapters with pooled async clients should override it to overlap
+        the requests.
+
+        Args:
+            customer_ids: The unique identifiers of the customers/contacts.
+
+        Returns:
+            A list with one get_customer_info-style result per input ID.
+        """
+        return [await self.get_customer_info(cid) for cid in customer_ids]
+
+    async def aclose(self) -> None:
+        """Releases any held network resources; default implementation is a no-op."""
+        return None
+
     # --- Placeholder for other common CRM operations ---
 
     # @abstractmethod
@@ -1,26 +1,32 @@
 """Factory function to create CRM adapter instances based on configuration."""
 
 import logging
+from functools import lru_cache
 from typing import Optional
 
 from .base import CRMWrapper
 from .amocrm import AmoCRMAdapter
-from src.config.settings import settings
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_crm_adapter() -> Optional[CRMWrapper]:
     """
-    Instantiates and returns a CRM adapter based on the provider specified
-    in the application settings.
+    Returns the process-wide CRM adapter, created on first call.
 
-    Reads CRM_PROVIDER from the settings object.
+    Reads CRM_PROVIDER from the settings object. The adapter is a singleton:
+    constructing one builds an HTTP connection pool and a response cache, so
+    repeat callers must share a single instance rather than rebuild it per
+    tool invocation. Settings are immutable per process, which makes the
+    cached instance safe.
 
     Returns:
         An instance of a class inheriting from CRMWrapper if the provider
         is supported and configured correctly, otherwise None.
     """
+    settings = get_settings()
     provider = settings.CRM_PROVIDER.lower()
     logger.info(f"Попытка настройки адаптера CRM для провайдера: {provider}")
 
@@ -50,4 +56,12 @@ def get_crm_adapter() -> Optional[CRMWrapper]:
 
     else:
         logger.error(f"Неподдерживаемый провайдер CRM в конфигурации: {provider}")
-        return None 
\ No newline at end of file
+        return None
+
+
+def clear_crm_adapter_cache() -> None:
+    """Drops the cached adapter so the next get_crm_adapter() rebuilds it.
+
+    Intended for tests that swap CRM configuration between cases.
+    """
+    get_crm_adapter.cache_clear() 
\ No newline at end of file
@@ -9,21 +9,34 @@ from telegram import Update, error
 from telegram.ext import (
     Application, CommandHandler, ContextTypes, MessageHandler, filters
 )
+from telegram.request import HTTPXRequest
 
-# Import the compile function and the placeholder variable
-# from src.agent.graph import compile_graph, agent_graph 
-# We only need the placeholder now
-from src.agent.graph import agent_graph 
-from src.config.settings import settings
+from src.config.settings import get_settings
+from src.tools.crm_tools import aclose_crm_adapter
 
 logger = logging.getLogger(__name__)
 
-# Remove the immediate check, compilation happens in setup_bot
-# _GRAPH_AVAILABLE = agent_graph is not None
-# if not _GRAPH_AVAILABLE:
-#     logger.critical(
-#         "Telegram Bot: Agent graph is not available! Please check graph compilation."
-#     )
+# The compiled agent graph lives in application.bot_data under this key —
+# no module-level global, so handlers read it via a LOAD_FAST on context
+# and multiple bots could each carry their own graph
+_AGENT_GRAPH_KEY = "agent_graph"
+
+
+# Employee role table, built once from settings on first message: frozenset
+# membership is an O(1) hash probe with no per-update allocations
+_employee_ids: Optional[frozenset] = None
+
+
+def _get_employee_ids() -> frozenset:
+    """Returns the cached set of Telegram user IDs holding the employee role."""
+    global _employee_ids
+    if _employee_ids is None:
+        _employee_ids = frozenset(
+            uid.strip() for uid in get_settings().EMPLOYEE_IDS.split(',') if uid.strip()
+        )
+        if _employee_ids:
+            logger.info(f"Загружено {len(_employee_ids)} ID сотрудников для RBAC.")
+    return _employee_ids
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -34,7 +47,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     Telegram user ID as the thread_id for persistent memory.
     Streams the response back by editing an initial placeholder message.
     """
-    # Check if agent_graph was successfully compiled during setup_bot
+    # The graph is stored in bot_data by setup_bot
+    agent_graph = context.bot_data.get(_AGENT_GRAPH_KEY)
     if agent_graph is None:
         logger.error("Граф агента недоступен (ошибка компиляции?), не могу обработать сообщение.")
         if update.message:
@@ -43,28 +57,16 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
         return
 
-    if not update.message or not update.message.text:
-        logger.debug("Ignoring non-text message update.")
-        return
-
+    # Text presence and sender presence are guaranteed by the handler's
+    # filter expression, so no Python-level guards are needed here
     user_input = update.message.text
-    if not update.effective_user:
-        logger.warning("Не удалось получить ID пользователя из обновления. Игнорирую сообщение.")
-        return
     user_id = str(update.effective_user.id) # Use effective_user for safety
     chat_id = update.message.chat_id
 
     logger.info(f"Получено сообщение от пользователя {user_id} в чате {chat_id}: '{user_input[:50]}...'")
 
     # --- Determine User Role ---
-    # TODO: Implement proper role determination logic based on user_id
-    #       For example, check against a list/DB of known employee IDs.
-    #       Consider loading internal IDs securely from config/env.
-    known_employee_ids = {} # Placeholder - Replace with actual internal user IDs if needed
-    if user_id in known_employee_ids:
-        user_role = "employee" # Example internal role
-    else:
-        user_role = "public" # Default role for external/unknown users
+    user_role = "employee" if user_id in _get_employee_ids() else "public"
     logger.info(f"Назначена роль '{user_role}' пользователю {user_id}")
 
     # --- Prepare Graph Input and Config ---
@@ -80,16 +82,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Configuration for the graph invocation, specifying the thread_id
     config = {"configurable": {"thread_id": user_id}}
 
-    # --- Send Initial Acknowledgement ---
-    message_id = None # Initialize message_id
-    try:
-        # Send placeholder and store the message object
-        sent_message = await update.message.reply_text("Печатаю...")
-        message_id = sent_message.message_id # Store the ID
-        logger.debug(f"Sent placeholder message with ID: {message_id} to chat {chat_id}")
-    except Exception as e:
-        logger.error(f"Не удалось отправить первоначальное подтверждение пользователю {user_id}: {e}")
-        return # Cannot proceed if we couldn't send the initial message
+    # --- Show Typing Indicator ---
+    # Fire-and-forget sendChatAction instead of a placeholder message: the
+    # user sees "typing..." immediately and the bot saves one API round-trip
+    # (no edit_message_text later)
+    asyncio.create_task(
+        context.bot.send_chat_action(chat_id=chat_id, action="typing")
+    )
 
     # --- Stream Graph Execution ---
     final_answer = "Произошла ошибка при обработке вашего запроса." # Initialize with default error
@@ -113,65 +112,75 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             logger.warning("Конечное состояние не содержит допустимого ключа 'generation'.")
             
-        # --- Remove the old astream loop and its logic --- 
-        # The old astream logic is now removed as ainvoke is used.
-        
-        # Edit the original message with the final response
-        if message_id:
-            logger.info(f"Редактирование сообщения {message_id} с финальным ответом для пользователя {user_id}: {final_answer[:100]}...")
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=message_id,
-                text=final_answer
-            )
-        else: # Should not happen if initial message was sent, but good practice
-             logger.warning("Не удалось отредактировать сообщение, так как message_id не найден. Отправка нового сообщения.")
-             await update.message.reply_text(final_answer)
+        # Send the final response as a single message
+        logger.info(f"Отправка финального ответа пользователю {user_id}: {final_answer[:100]}...")
+        await update.message.reply_text(final_answer)
 
     except Exception as e:
         # Log the specific exception type and message
         logger.error(f"Ошибка вызова графа агента для пользователя {user_id}: {type(e).__name__} - {e}", exc_info=True)
         final_error_message = "Извините, произошла ошибка при обработке вашего запроса. Пожалуйста, попробуйте снова."
-        # Attempt to update the message with a generic error
-        if message_id:
-            try:
-                await context.bot.edit_message_text(
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    text=final_error_message
-                )
-            except Exception as edit_e:
-                logger.error(f"Не удалось отредактировать сообщение {message_id} с сообщением об ошибке для {user_id}: {edit_e}")
-        else: # Fallback if initial message failed or ID was lost
-             logger.error(f"Не удалось отправить сообщение об ошибке пользователю {user_id}, так как message_id отсутствует.")
-             # Optionally send a new message here if critical
-             # await update.message.reply_text(final_error_message)
+        try:
+            await update.message.reply_text(final_error_message)
+        except Exception as send_e:
+            logger.error(f"Не удалось отправить сообщение об ошибке пользователю {user_id}: {send_e}")
+
+
+async def _close_crm_client(application: Application) -> None:
+    """post_shutdown hook: releases the CRM adapter's pooled HTTP connections."""
+    await aclose_crm_adapter()
 
 
 # setup_bot now takes the compiled graph as an argument
 async def setup_bot(compiled_graph: Any) -> Application:
     """Initializes the Telegram bot application using the pre-compiled agent graph and adds handlers."""
-    global agent_graph # Declare intent to modify the global variable
-
+    settings = get_settings()
     if not settings.TELEGRAM_BOT_TOKEN:
         logger.critical("TELEGRAM_BOT_TOKEN не указан в настройках. Невозможно запустить бота.")
         raise ValueError("Отсутствует TELEGRAM_BOT_TOKEN")
-    
-    # --- Assign the Compiled Graph --- 
+
+    # --- Validate the Compiled Graph ---
     if compiled_graph is None:
          logger.critical("Предоставленный compiled_graph равен None. Невозможно настроить Telegram бота.")
          raise RuntimeError("Граф агента недоступен.")
-    else:
-        # Assign the pre-compiled graph to the module-level variable
-        agent_graph = compiled_graph 
-        logger.info("Используется предоставленный скомпилированный граф агента.")
 
     # --- Initialize Bot --- 
     logger.info("Инициализация Telegram приложения...")
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
-
-    # --- Add Handlers --- 
-    message_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message)
+    # concurrent_updates dispatches each update as its own task, so a slow
+    # handler (LLM round-trip) in one chat doesn't block other chats.
+    # Dedicated pooled HTTPX clients keep TCP/TLS connections warm between
+    # requests; read timeouts sit above Telegram's 30s long-poll window.
+    application = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
+        .request(HTTPXRequest(
+            connection_pool_size=64,
+            read_timeout=35,
+            connect_timeout=10,
+            pool_timeout=5,
+        ))
+        .get_updates_request(HTTPXRequest(
+            connection_pool_size=32,
+            read_timeout=35,
+        ))
+        .post_shutdown(_close_crm_client)
+        .build()
+    )
+
+    # Handlers pull the graph from bot_data instead of module-level state
+    application.bot_data[_AGENT_GRAPH_KEY] = compiled_graph
+    logger.info("Скомпилированный граф агента сохранён в bot_data приложения.")
+
+    # --- Add Handlers ---
+    # The filter also requires a sender (filters.User with allow_empty=True
+    # matches any update that has a from_user), so non-text or senderless
+    # updates are rejected inside PTB's dispatch — no handler coroutine is
+    # ever scheduled for them
+    message_handler = MessageHandler(
+        filters.TEXT & ~filters.COMMAND & filters.User(allow_empty=True),
+        handle_message,
+    )
     application.add_handler(message_handler)
 
     # Optional: Add CommandHandlers later
@@ -7,10 +7,15 @@ RBAC information (allowed_roles) for secure retrieval.
 """
 
 # Import necessary libraries
-from pathlib import Path
-from typing import List, Dict, Any, Optional, Generator, Tuple
+import asyncio
 import logging
+import os
 import re
+import sys
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncGenerator, Iterable, List, Dict, Any, Optional, Generator, Tuple
 
 # LangChain imports
 from langchain_core.documents import Document
@@ -19,6 +24,59 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = logging.getLogger(__name__)
 
+# Role keywords checked against document paths, hoisted to module scope so the
+# table is built once instead of per _extract_roles_from_path call
+_ROLE_KEYWORDS: Dict[str, List[str]] = {
+    'public': ['public', 'external', 'customer'],
+    'employee': ['employee', 'internal', 'staff', 'team'],
+    'manager': ['manager', 'management', 'supervisor'],
+    'hr': ['hr', 'human_resources', 'human-resources'],
+    'finance': ['finance', 'financial', 'accounting'],
+    'sales': ['sales', 'marketing'],
+    'support': ['support', 'helpdesk', 'customer_service'],
+    'tech': ['tech', 'technical', 'engineering', 'developer'],
+    'legal': ['legal', 'compliance', 'regulatory']
+}
+
+# One precompiled alternation per role replaces the nested Python substring
+# loops with a handful of C-level scans of the path. Scanning per role (rather
+# than one combined alternation) keeps the original semantics for overlapping
+# keywords: 'customer_service' in a path still grants both support (via
+# 'customer_service') and public (via 'customer').
+# Role names are interned: every chunk's allowed_roles then references the
+# same few string singletons instead of duplicating them per metadata dict
+_ROLE_PATTERNS: List[Tuple[str, "re.Pattern[str]"]] = [
+    (
+        sys.intern(role),
+        re.compile(
+            "|".join(re.escape(keyword) for keyword in keywords),
+            re.IGNORECASE,
+        ),
+    )
+    for role, keywords in _ROLE_KEYWORDS.items()
+]
+
+
+def _make_loader(path_str: str, mode: str = "single"):
+    """Picks the Unstructured loader for a file.
+
+    mode="single" returns one Document per file — the splitter re-chunks the
+    text anyway, so element-level granularity (one Document per layout
+    element, hundreds per PDF) only pays off when per-element metadata like
+    page numbers is actually needed downstream.
+    """
+    if Path(path_str).suffix.lower() == '.md':
+        return UnstructuredMarkdownLoader(path_str, mode=mode)
+    return UnstructuredFileLoader(path_str, mode=mode)
+
+
+def _load_file_elements(path_str: str, mode: str = "single") -> List[Document]:
+    """Loads a file eagerly into a Document list; module-level so it pickles
+    cleanly into ProcessPoolExecutor workers (results cross process borders
+    and must be materialized anyway)."""
+    return _make_loader(path_str, mode).load()
+
+
 class DocumentProcessor:
     """
     Handles the loading, processing, and chunking of documents with metadata extraction.
@@ -36,6 +94,7 @@ class DocumentProcessor:
             chunk_size (int): The maximum size of each document chunk. Defaults to 1000.
             chunk_overlap (int): The overlap between consecutive chunks. Defaults to 200.
         """
+        self.chunk_size = chunk_size
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -56,68 +115,49 @@ class DocumentProcessor:
         Returns:
             List[str]: A list of inferred roles based on the path
         """
-        roles = []
-        
-        # Convert path parts to lowercase for case-insensitive matching
-        path_str = str(file_path).lower()
-        parent_dir = file_path.parent.name.lower()
-        
-        # Common role keywords to check for in paths
-        role_keywords = {
-            'public': ['public', 'external', 'customer'],
-            'employee': ['employee', 'internal', 'staff', 'team'],
-            'manager': ['manager', 'management', 'supervisor'],
-            'hr': ['hr', 'human_resources', 'human-resources'],
-            'finance': ['finance', 'financial', 'accounting'],
-            'sales': ['sales', 'marketing'],
-            'support': ['support', 'helpdesk', 'customer_service'],
-            'tech': ['tech', 'technical', 'engineering', 'developer'],
-            'legal': ['legal', 'compliance', 'regulatory']
-        }
-        
-        # Check for role keywords in the path
-        for role, keywords in role_keywords.items():
-            for keyword in keywords:
-                if keyword in path_str or keyword in parent_dir:
-                    roles.append(role)
-                    break  # Once we've added a role, no need to check other keywords
-        
-        # If we identified any roles, log them
+        # One case-insensitive search per role over the full path (which
+        # already contains the parent directory name)
+        path_str = str(file_path)
+        roles = [role for role, pattern in _ROLE_PATTERNS if pattern.search(path_str)]
+
+        # If we identified any roles, log them (lazy %-formatting: the
+        # arguments are only rendered if a DEBUG handler takes the record)
         if roles:
-            logger.debug(f"Inferred roles {roles} from path: {file_path}")
+            logger.debug("Inferred roles %s from path: %s", roles, file_path)
         else:
-            logger.debug(f"No roles inferred from path: {file_path}")
-            
+            logger.debug("No roles inferred from path: %s", file_path)
+
         return roles
     
     def load_and_split_documents(
-        self, 
-        file_path: Path, 
-        default_roles: Optional[List[str]] = None
+        self,
+        file_path: Path,
+        default_roles: Optional[List[str]] = None,
+        elements_mode: bool = False
     ) -> Generator[Document, None, None]:
         """
         Load a document, split it into chunks, and yield each chunk with proper metadata.
-        
+
         This method loads a document from the specified file path, processes it to extract
         metadata including RBAC information, splits it into manageable chunks, and yields
         each chunk as a Document object.
-        
+
         Args:
             file_path (Path): The path to the document to process
             default_roles (Optional[List[str]]): Default roles to assign if none are inferred
-                
+            elements_mode (bool): Load one Document per Unstructured layout
+                element instead of one per file. Off by default — the splitter
+                re-chunks the text anyway, and element mode multiplies the
+                metadata plumbing a hundredfold on large PDFs. Enable only
+                when per-element metadata (page numbers, element type) matters.
+
         Yields:
             Document: Processed document chunks with metadata
-            
+
         Raises:
             FileNotFoundError: If the specified file does not exist
             ValueError: If there are issues processing the document
         """
-        if not file_path.exists():
-            error_msg = f"Document not found: {file_path}"
-            logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
-        
         # Ensure default_roles is a list, not None
         if default_roles is None:
             default_roles = []
@@ -125,74 +165,192 @@ class DocumentProcessor:
         logger.info(f"Processing document: {file_path}")
         
         try:
-            # Load the document using appropriate loader based on extension
-            file_suffix = file_path.suffix.lower()
-            if file_suffix == '.md':
-                logger.debug(f"Using UnstructuredMarkdownLoader for {file_path.name}")
-                loader = UnstructuredMarkdownLoader(str(file_path), mode="elements")
-            else:
-                # Fallback to generic loader for other types (PDF, DOCX, etc.)
-                logger.debug(f"Using UnstructuredFileLoader for {file_path.name}")
-                loader = UnstructuredFileLoader(str(file_path), mode="elements")
-                
-            docs = loader.load()
-            logger.info(f"Loaded {len(docs)} elements from {file_path}")
+            # Stream elements straight out of the loader: chunks for the
+            # first elements are yielded while later ones are still being
+            # parsed, and the full element list never sits in memory at once
+            loader = _make_loader(
+                str(file_path),
+                mode="elements" if elements_mode else "single"
+            )
+            lazy_load = getattr(loader, "lazy_load", None)
+            docs_iter = lazy_load() if lazy_load is not None else loader.load()
+
+            yield from self._split_elements(docs_iter, file_path, default_roles)
+
+        except FileNotFoundError as e:
+            # EAFP: no up-front exists() stat — the loader's own open() is the
+            # single authoritative (and race-free) existence check
+            error_msg = f"Document not found: {file_path}"
+            logger.error(error_msg)
+            raise FileNotFoundError(error_msg) from e
+        except Exception as e:
+            error_msg = f"Error processing document {file_path}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            raise ValueError(error_msg) from e
+
+    def _split_elements(
+        self,
+        docs: Iterable[Document],
+        file_path: Path,
+        default_roles: List[str]
+    ) -> Generator[Document, None, None]:
+        """
+        Chunks loaded Unstructured elements and yields Documents with metadata.
+
+        Shared by the synchronous single-file path and the parallel multi-file
+        path — loading happens elsewhere, this is the cheap CPU-side half.
+
+        Args:
+            docs: Elements produced by an Unstructured loader.
+            file_path (Path): Path the elements were loaded from.
+            default_roles (List[str]): Roles to assign when none are inferred.
+
+        Yields:
+            Document: Processed document chunks with metadata.
+        """
+        # Path-derived values are identical for every element of the file:
+        # stringify the path once, and run role inference once instead of
+        # per element. The metadata dicts then all share the same string
+        # objects instead of fresh conversions.
+        # Interned so re-ingesting the same file later reuses the existing
+        # string objects rather than allocating fresh duplicates
+        fp_str = sys.intern(str(file_path))
+        fp_name = sys.intern(file_path.name)
+        path_roles = self._extract_roles_from_path(file_path)
+
+        # Process each element/document from the loader
+        for doc_idx, doc in enumerate(docs):
+            # Extract metadata and add source
+            metadata = doc.metadata.copy()  # Start with existing metadata
+            metadata['source'] = fp_name
+            metadata['full_path'] = fp_str
+
+            # Determine allowed roles (Strategy A + B)
+            roles = path_roles if path_roles else default_roles.copy()
+
+            # Add the allowed_roles metadata - CRUCIAL for RBAC
+            metadata['allowed_roles'] = roles
+            logger.debug("Document chunk %d from %s assigned roles: %s", doc_idx, fp_name, roles)
             
-            # Process each element/document from the loader
-            for doc_idx, doc in enumerate(docs):
-                # Extract metadata and add source
-                metadata = doc.metadata.copy()  # Start with existing metadata
-                metadata['source'] = str(file_path.name)
-                metadata['full_path'] = str(file_path)
-                
-                # Determine allowed roles (Strategy A + B)
-                path_roles = self._extract_roles_from_path(file_path)
-                roles = path_roles if path_roles else default_roles.copy()
-                
-                # Add the allowed_roles metadata - CRUCIAL for RBAC
-                metadata['allowed_roles'] = roles
-                logger.debug(f"Document chunk {doc_idx} from {file_path.name} assigned roles: {roles}")
-                
-                # Split the content into chunks
-                text_chunks = self.text_splitter.split_text(doc.page_content)
-                
-                # If we got multiple chunks, create new Documents
-                if len(text_chunks) > 1:
-                    logger.debug(f"Split element {doc_idx} into {len(text_chunks)} chunks")
-                    
-                    # Create and yield a Document for each chunk, with copied metadata
-                    for i, chunk in enumerate(text_chunks):
-                        if not chunk.strip():  # Skip empty chunks
-                            continue
-                            
-                        # Create a new metadata dict for each chunk to avoid cross-references
-                        chunk_metadata = metadata.copy()
-                        # Add chunk-specific metadata
-                        chunk_metadata['chunk_id'] = f"{doc_idx}-{i}"
-                        
-                        # --- BEGIN ADDED LOGGING ---
-                        logger.debug(f"Yielding chunk {chunk_metadata.get('chunk_id')} with metadata: {chunk_metadata}")
-                        # --- END ADDED LOGGING ---
-                        
-                        yield Document(
-                            page_content=chunk,
-                            metadata=chunk_metadata
-                        )
-                # If there's only one chunk, use the original document with updated metadata
-                elif text_chunks and text_chunks[0].strip():
-                    # Update the metadata with chunk_id
+            # Fast path: an element that already fits in one chunk never
+            # needs the splitter's recursive machinery — len() is an O(1)
+            # size read, so this check is effectively free
+            # Strip up front to mirror the splitter's own whitespace
+            # handling on the output chunk
+            page_content = doc.page_content.strip()
+            if len(page_content) <= self.chunk_size:
+                if page_content:
                     metadata['chunk_id'] = f"{doc_idx}-0"
-                    
-                    # --- BEGIN ADDED LOGGING ---
-                    logger.debug(f"Yielding single chunk {metadata.get('chunk_id')} with metadata: {metadata}")
-                    # --- END ADDED LOGGING ---
-                    
+
+                    # Guarded: repr()-ing the metadata dict for every chunk
+                    # is pure waste when DEBUG is off
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Yielding single chunk %s with metadata: %s", metadata['chunk_id'], metadata)
+
                     yield Document(
-                        page_content=text_chunks[0],
+                        page_content=page_content,
                         metadata=metadata
                     )
-        
-        except Exception as e:
-            error_msg = f"Error processing document {file_path}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            raise ValueError(error_msg) from e 
\ No newline at end of file
+                continue
+
+            # Split the content into chunks
+            text_chunks = self.text_splitter.split_text(page_content)
+
+            # If we got multiple chunks, create new Documents
+            if len(text_chunks) > 1:
+                logger.debug("Split element %d into %d chunks", doc_idx, len(text_chunks))
+
+                # The chunk_id prefix is shared by every chunk of this
+                # element, so format it once outside the loop
+                chunk_id_prefix = f"{doc_idx}-"
+
+                # Read-only view of the shared base: nothing in (or after)
+                # the loop can mutate it between chunks, so every chunk's
+                # merged dict is guaranteed to see identical base values
+                base_metadata = MappingProxyType(metadata)
+
+                for i, chunk in enumerate(text_chunks):
+                    if not chunk.strip():  # Skip empty chunks before allocating anything
+                        continue
+
+                    # One dict-display merge per chunk instead of
+                    # .copy() followed by item assignment; unpacking the
+                    # shared base still yields an independent dict
+                    chunk_metadata = {**base_metadata, 'chunk_id': chunk_id_prefix + str(i)}
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Yielding chunk %s with metadata: %s", chunk_metadata['chunk_id'], chunk_metadata)
+
+                    yield Document(
+                        page_content=chunk,
+                        metadata=chunk_metadata
+                    )
+            # If there's only one chunk, use the original document with updated metadata
+            elif text_chunks and text_chunks[0].strip():
+                # Update the metadata with chunk_id
+                metadata['chunk_id'] = f"{doc_idx}-0"
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Yielding single chunk %s with metadata: %s", metadata['chunk_id'], metadata)
+
+                yield Document(
+                    page_content=text_chunks[0],
+                    metadata=metadata
+                )
+
+    async def aload_and_split_many(
+        self,
+        file_paths: List[Path],
+        default_roles: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = 8,
+        elements_mode: bool = False
+    ) -> AsyncGenerator[Document, None]:
+        """
+        Load and chunk many documents, parsing files on a process pool.
+
+        Unstructured parsing (OCR, PDF layout analysis) is CPU-bound and
+        dominates ingestion time, so files fan out to worker processes and
+        chunks stream back as each file finishes. Chunking itself is cheap
+        and stays in this process. Files are submitted in batches so a long
+        path list does not hold every parsed document in memory at once.
+
+        Args:
+            file_paths (List[Path]): Paths of the documents to process.
+            default_roles (Optional[List[str]]): Roles to assign when none
+                are inferred from a path.
+            max_workers (Optional[int]): Worker process count; defaults to
+                the CPU count.
+            batch_size (int): Files in flight per batch (memory back-pressure).
+            elements_mode (bool): See load_and_split_documents.
+
+        Yields:
+            Document: Processed document chunks with metadata, grouped by
+            file in completion order.
+        """
+        if default_roles is None:
+            default_roles = []
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+
+            mode = "elements" if elements_mode else "single"
+
+            async def _load_one(path: Path) -> Tuple[Path, List[Document]]:
+                return path, await loop.run_in_executor(
+                    executor, _load_file_elements, str(path), mode
+                )
+
+            for batch_start in range(0, len(file_paths), batch_size):
+                batch = file_paths[batch_start:batch_start + batch_size]
+                tasks = [asyncio.ensure_future(_load_one(path)) for path in batch]
+                for completed in asyncio.as_completed(tasks):
+                    try:
+                        path, docs = await completed
+                    except Exception as e:
+                        # One broken file must not abort the whole ingestion run
+                        logger.error(f"Worker-pool document load failed: {e}", exc_info=True)
+                        continue
+                    logger.info(f"Loaded {len(docs)} elements from {path}")
+                    for document in self._split_elements(docs, path, default_roles):
+                        yield document
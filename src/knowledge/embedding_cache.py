@@ -0,0 +1,141 @@
+"""Two-tier cache for query embeddings (in-memory LRU + SQLite with TTL).
+
+Repeated queries ("повторите", paginated follow-ups, benchmark re-runs) would
+otherwise re-pay the embedding API round-trip and token cost every time. Cache
+keys include the model name so switching embedding models never serves stale
+vectors.
+"""
+
+import hashlib
+import logging
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Disk tier lives next to the other persistent SQLite databases
+_DEFAULT_DB_PATH = "data/persistent/embedding_cache.sqlite"
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an Embeddings instance, caching embed_query results.
+
+    Lookups check an in-memory LRU first, then the SQLite tier (entries
+    expire after `ttl` seconds), and only fall through to the wrapped model
+    on a miss. Document embedding calls pass straight through — the ingestion
+    pipeline embeds each chunk once, so caching there would only burn memory.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        capacity: int = 10_000,
+        ttl: float = 3600.0,
+        db_path: str = _DEFAULT_DB_PATH,
+    ) -> None:
+        self.inner = inner
+        self.capacity = capacity
+        self.ttl = ttl
+        self._memory: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            path = Path(db_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key BLOB PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            # The cache degrades to memory-only; embedding still works
+            logger.warning(f"Не удалось открыть дисковый кэш эмбеддингов ({db_path}): {e}")
+            self._conn = None
+
+    def _key(self, text: str) -> bytes:
+        """Hashes model name + text so keys never collide across models."""
+        model_name = getattr(self.inner, "model", type(self.inner).__name__)
+        return hashlib.sha256(f"{model_name}\x00{text}".encode()).digest()
+
+    def _remember(self, key: bytes, vector: List[float]) -> None:
+        """Inserts into the in-memory LRU, evicting the oldest entry if full."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: bytes) -> Optional[List[float]]:
+        """Returns a cached vector from memory or disk, or None on miss."""
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+
+        if self._conn is not None:
+            try:
+                row = self._conn.execute(
+                    "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    blob, created_at = row
+                    if time.time() - created_at <= self.ttl:
+                        vector = pickle.loads(blob)
+                        self._remember(key, vector)
+                        return vector
+                    # Expired: drop so the table doesn't accumulate dead rows
+                    self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                    self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Ошибка чтения из дискового кэша эмбеддингов: {e}")
+        return None
+
+    def _store(self, key: bytes, vector: List[float]) -> None:
+        """Stores a fresh vector in both tiers."""
+        self._remember(key, vector)
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, pickle.dumps(vector), time.time()),
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Ошибка записи в дисковый кэш эмбеддингов: {e}")
+
+    # --- Embeddings interface ---
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            logger.debug("Кэш эмбеддингов: попадание для запроса.")
+            return cached
+        vector = self.inner.embed_query(text)
+        self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # The SQLite lookup is a sub-millisecond local read; not worth a
+        # thread hop
+        key = self._key(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            logger.debug("Кэш эмбеддингов: попадание для запроса.")
+            return cached
+        vector = await self.inner.aembed_query(text)
+        self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_documents(texts)
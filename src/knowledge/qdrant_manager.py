@@ -1,15 +1,38 @@
 """Manages interaction with the Qdrant vector database."""
 
 import logging
+from functools import lru_cache
 from typing import List, Optional
 
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from qdrant_client.http.models import Distance, VectorParams, PointStruct, UpdateResult, Filter, CollectionStatus
 
-from src.config.settings import settings
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Search against the int8-quantized vectors, oversample the candidate set and
+# rescore it with the original float vectors: quantization speed with
+# (near-)full-precision ranking for the final top-K
+_QUANTIZED_SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(
+        rescore=True,
+        oversampling=2.0,
+    )
+)
+
+# Default storage quantization for new collections: int8 scalar quantization
+# keeps a 1-byte-per-dimension copy always in RAM (~4x less memory bandwidth
+# per search) with minimal recall loss for cosine distance. The top 1% of
+# component values is clipped so outliers don't stretch the int8 range.
+_DEFAULT_QUANTIZATION = models.ScalarQuantization(
+    scalar=models.ScalarQuantizationConfig(
+        type=models.ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    )
+)
+
 
 class QdrantManager:
     """Handles Qdrant client initialization, collection management, and operations."""
@@ -18,15 +41,29 @@ class QdrantManager:
         """
         Initializes the Qdrant client using settings and checks connection.
         """
+        settings = get_settings()
         self.collection_name: str = settings.QDRANT_COLLECTION_NAME
         try:
             self.client = QdrantClient(
                 host=settings.QDRANT_HOST,
                 port=settings.QDRANT_PORT,
                 api_key=settings.QDRANT_API_KEY,
-                # prefer_grpc=True, # Optional: Consider enabling for performance
+                # gRPC sends vectors as raw float32 protobuf instead of JSON
+                # floats (~5x smaller on the wire, no JSON encode/decode cost)
+                prefer_grpc=True,
+                grpc_port=6334,
                 timeout=20 # Set a reasonable timeout
             )
+            # Async counterpart for the request path: search runs on the
+            # event loop without a worker thread or blocking HTTP call
+            self.async_client = AsyncQdrantClient(
+                host=settings.QDRANT_HOST,
+                port=settings.QDRANT_PORT,
+                api_key=settings.QDRANT_API_KEY,
+                prefer_grpc=True,
+                grpc_port=6334,
+                timeout=20
+            )
             # Basic health check - Rely on instantiation success
             # self.client.list_collections() # Removed, causes AttributeError
             logger.info(
@@ -42,7 +79,8 @@ class QdrantManager:
     def ensure_collection_exists(
         self,
         vector_size: int,
-        distance: models.Distance = models.Distance.COSINE
+        distance: models.Distance = models.Distance.COSINE,
+        quantization: Optional[models.QuantizationConfig] = None
     ) -> None:
         """
         Checks if the specified collection exists, and creates it if not.
@@ -50,6 +88,9 @@ class QdrantManager:
         Args:
             vector_size: The dimensionality of the vectors to be stored.
             distance: The distance metric to use for vector comparison.
+            quantization: Storage quantization for the collection; defaults
+                to int8 scalar quantization (pass e.g. BinaryQuantization for
+                very large corpora).
         """
         try:
             collection_info = self.client.get_collection(self.collection_name)
@@ -61,6 +102,9 @@ class QdrantManager:
                 # current_config = collection_info.vectors_config.params
                 # if current_config.size != vector_size or current_config.distance != distance:
                 #     logger.warning(f"Collection '{self.collection_name}' exists but config mismatch!")
+                # Indexes are idempotent, so pre-existing collections get
+                # them retrofitted here as well
+                self._ensure_payload_indexes()
             else:
                  logger.warning(
                     f"Коллекция '{self.collection_name}' существует, но статус "
@@ -78,15 +122,23 @@ class QdrantManager:
             try:
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=vector_size, distance=distance),
+                    # Raw float32 vectors live on disk; searches run against
+                    # the quantized in-RAM copy and only rescoring touches the
+                    # originals, so the resident working set shrinks ~4x
+                    vectors_config=VectorParams(
+                        size=vector_size,
+                        distance=distance,
+                        on_disk=True,
+                    ),
+                    quantization_config=quantization or _DEFAULT_QUANTIZATION,
                     # Optional: Add other configurations like HNSW parameters here
                     # hnsw_config=models.HnswConfigDiff(...),
-                    # quantisation_config=models.ScalarQuantization(...)
                 )
                 logger.info(
                     f"Успешно создана коллекция '{self.collection_name}' "
                     f"с размером вектора {vector_size} и метрикой расстояния {distance}."
                 )
+                self._ensure_payload_indexes()
             except Exception as create_error:
                 logger.error(
                     f"Не удалось создать коллекцию '{self.collection_name}': {create_error}",
@@ -94,6 +146,34 @@ class QdrantManager:
                 )
                 raise  # Re-raise the exception after logging
 
+    def _ensure_payload_indexes(self) -> None:
+        """
+        Creates keyword payload indexes for the fields every search filters on.
+
+        The RBAC filter matches allowed_roles on each query; without an index
+        Qdrant evaluates the filter with a linear payload scan, which comes to
+        dominate search time as the collection grows. A keyword index turns
+        that into a posting-list lookup. 'source' is indexed too for
+        per-document deletes and filtered maintenance queries. Creation is
+        idempotent — an already-existing index is logged and skipped.
+        """
+        for field_name in ("allowed_roles", "source"):
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+                logger.info(
+                    f"Создан payload-индекс по полю '{field_name}' "
+                    f"в коллекции '{self.collection_name}'."
+                )
+            except Exception as index_error:
+                logger.warning(
+                    f"Не удалось создать payload-индекс по полю '{field_name}' "
+                    f"(возможно, уже существует): {index_error}"
+                )
+
     def delete_collection(self) -> bool:
         """
         Deletes the configured collection from Qdrant.
@@ -121,67 +201,101 @@ class QdrantManager:
             logger.error(f"Не удалось удалить коллекцию '{self.collection_name}': {e}", exc_info=True)
             return False
 
-    def upsert_points(self, points: List[PointStruct]) -> Optional[UpdateResult]:
+    def upsert_points(
+        self,
+        points: List[PointStruct],
+        batch_size: int = 256
+    ) -> Optional[UpdateResult]:
         """
-        Upserts (inserts or updates) points into the collection.
+        Upserts (inserts or updates) points into the collection in batches.
+
+        Large point lists are sent in slices so no single request has to
+        serialize the whole payload at once. Intermediate batches use
+        wait=False — the server indexes them while the client serializes the
+        next slice — and only the final batch waits for confirmation.
 
         Args:
             points: A list of PointStruct objects to upsert.
+            batch_size: Maximum number of points per upsert request.
 
         Returns:
-            Optional[UpdateResult]: The result of the upsert operation, or None if failed.
+            Optional[UpdateResult]: The result of the final upsert operation,
+            or None if failed.
         """
         if not self.client:
             logger.error("Клиент Qdrant недоступен, невозможно добавить точки.")
             return None
-            
+
         if not points:
             logger.warning("Вызван upsert с пустым списком точек. Операция не выполнена.")
             return None
-            
-        logger.debug(f"Попытка добавления {len(points)} точек...")
+
+        logger.debug(f"Попытка добавления {len(points)} точек партиями по {batch_size}...")
         try:
-            # Use wait=True for synchronous confirmation
-            operation_info: UpdateResult = self.client.upsert(
-                collection_name=self.collection_name,
-                points=points,
-                wait=True # wait=True ensures operation is finished before returning
-            )
+            total = len(points)
+            operation_info: Optional[UpdateResult] = None
+            for start in range(0, total, batch_size):
+                operation_info = self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points[start:start + batch_size],
+                    # Only the last batch blocks until the server confirms;
+                    # earlier ones overlap with client-side serialization
+                    wait=(start + batch_size >= total)
+                )
             logger.debug(f"Результат операции upsert: {operation_info.status if operation_info else 'N/A'}")
-            # Consider adding more robust status checking if needed
-            # if operation_info and operation_info.status != models.UpdateStatus.COMPLETED:
-            #    logger.warning(f"Upsert operation status: {operation_info.status}")
             return operation_info
         except Exception as e:
             logger.error(f"Не удалось добавить точки: {e}", exc_info=True)
             # Handle error appropriately
             return None
 
-    def search(
+    async def search(
         self,
         query_vector: List[float],
         query_filter: Optional[models.Filter] = None,
-        limit: int = 5,
-        **kwargs # Allow passing other search parameters like score_threshold
+        limit: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        **kwargs # Allow passing other search parameters
     ) -> List[models.ScoredPoint]:
         """
-        Performs a vector search in the collection.
+        Performs a vector search in the collection (async, over gRPC).
 
         Args:
             query_vector: The vector to search for.
             query_filter: Optional filter to apply during the search (for RBAC).
-            limit: The maximum number of results to return.
-            **kwargs: Additional search parameters (e.g., score_threshold).
+            limit: The maximum number of results to return
+                (defaults to settings.QDRANT_TOP_K).
+            score_threshold: Minimum similarity score for results
+                (defaults to settings.QDRANT_SCORE_THRESHOLD).
+            **kwargs: Additional search parameters.
 
         Returns:
             A list of ScoredPoint objects representing the search results.
         """
+        # Client-side short-circuit: an RBAC condition that matches no roles
+        # can't return anything, so skip the server round-trip entirely
+        if query_filter is not None and query_filter.must:
+            for condition in query_filter.must:
+                if (
+                    getattr(condition, "key", None) == "allowed_roles"
+                    and isinstance(getattr(condition, "match", None), models.MatchAny)
+                    and not condition.match.any
+                ):
+                    logger.debug("RBAC фильтр не содержит ролей — поиск пропущен.")
+                    return []
+
+        settings = get_settings()
         try:
-            search_result = self.client.search(
+            search_result = await self.async_client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
                 query_filter=query_filter,
-                limit=limit,
+                limit=limit if limit is not None else settings.QDRANT_TOP_K,
+                score_threshold=(
+                    score_threshold if score_threshold is not None
+                    else settings.QDRANT_SCORE_THRESHOLD
+                ),
+                search_params=_QUANTIZED_SEARCH_PARAMS,
                 **kwargs
             )
             logger.debug(f"Поиск нашел {len(search_result)} результатов.")
@@ -192,13 +306,50 @@ class QdrantManager:
             return []
 
 
-# Create a singleton instance for easy import
-# Note: Ensure logging is configured before this module is imported if logging
-# within __init__ is critical for initial setup diagnosis.
-try:
-    qdrant_manager = QdrantManager()
-except ConnectionError:
-    # If connection fails on startup, set manager to None or handle gracefully
-    qdrant_manager = None
-    logger.critical("Инициализация QdrantManager не удалась из-за ошибки подключения.")
-    # Depending on application design, might exit or continue in degraded mode 
\ No newline at end of file
+    async def search_batch(
+        self,
+        requests: List[models.SearchRequest]
+    ) -> List[List[models.ScoredPoint]]:
+        """
+        Executes several searches in one round-trip (async, over gRPC).
+
+        For multi-query retrieval (query expansion, HyDE and similar) this
+        costs one network round-trip instead of one per query; the server
+        runs the requests concurrently. Per-request parameters (filter,
+        limit, score threshold, quantization params) travel inside each
+        SearchRequest.
+
+        Args:
+            requests: Fully-specified SearchRequest objects.
+
+        Returns:
+            One result list per request, in request order; empty on failure.
+        """
+        try:
+            results = await self.async_client.search_batch(
+                collection_name=self.collection_name,
+                requests=requests,
+            )
+            logger.debug("Пакетный поиск выполнил %d запросов.", len(requests))
+            return results
+        except Exception as e:
+            logger.error(f"Не удалось выполнить пакетный поиск: {e}", exc_info=True)
+            return []
+
+
+@lru_cache(maxsize=1)
+def get_qdrant_manager() -> Optional[QdrantManager]:
+    """
+    Returns the process-wide QdrantManager, created on first call.
+
+    Lazy construction keeps module import free of network work (the manager
+    opens TCP/gRPC connections), and makes the clients fork-safe: a worker
+    process builds its own connections on first use instead of inheriting a
+    parent's sockets. Returns None if the connection fails — callers treat
+    that as "Qdrant unavailable", as with the old import-time singleton.
+    """
+    try:
+        return QdrantManager()
+    except ConnectionError:
+        logger.critical("Инициализация QdrantManager не удалась из-за ошибки подключения.")
+        return None 
\ No newline at end of file
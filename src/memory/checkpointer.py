@@ -11,7 +11,7 @@ from pathlib import Path
 # from langgraph_checkpoint_sqlite import SqliteSaver # Sync version
 from langgraph_checkpoint_sqlite import AsyncSqliteSaver # <-- Use Async version
 
-from src.config.settings import settings
+from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +19,7 @@ logger = logging.getLogger(__name__)
 def get_checkpointer_context():
     """Returns the async context manager for the SqliteSaver."""
     try:
-        db_path = Path(settings.SQLITE_MEMORY_DB_PATH)
+        db_path = Path(get_settings().SQLITE_MEMORY_DB_PATH)
         # Ensure the parent directory exists
         db_path.parent.mkdir(parents=True, exist_ok=True)
         logger.info(f"Контекст SQLite чекпоинтера настроен для: {db_path.resolve()}")
@@ -32,6 +32,37 @@ def get_checkpointer_context():
         logger.error(f"Не удалось настроить контекст SQLite чекпоинтера (AsyncSqliteSaver): {e}", exc_info=True)
         raise # Reraise other exceptions
 
+async def apply_performance_pragmas(checkpointer: AsyncSqliteSaver) -> None:
+    """Tunes the checkpointer's SQLite connection for write throughput.
+
+    The checkpointer persists every graph state transition, making it the
+    hottest write path in the bot. WAL mode allows a concurrent reader and
+    writer, and synchronous=NORMAL drops the per-transaction fsync — together
+    orders of magnitude faster commits for small state writes than the
+    default DELETE journal with synchronous=FULL.
+
+    Must be called after the checkpointer context has been entered (i.e. the
+    underlying aiosqlite connection is open).
+    """
+    conn = getattr(checkpointer, "conn", None)
+    if conn is None:
+        logger.warning("Не удалось получить соединение чекпоинтера для настройки PRAGMA.")
+        return
+
+    try:
+        await conn.execute("PRAGMA journal_mode=WAL;")
+        await conn.execute("PRAGMA synchronous=NORMAL;")
+        await conn.execute("PRAGMA temp_store=MEMORY;")
+        await conn.execute("PRAGMA cache_size=-64000;")  # 64 MB page cache
+        # Memory-mapped reads: checkpoint loads hit the page cache directly
+        # instead of going through read() syscalls (256 MB window)
+        await conn.execute("PRAGMA mmap_size=268435456;")
+        await conn.commit()
+        logger.info("SQLite чекпоинтер переведен в режим WAL (synchronous=NORMAL).")
+    except Exception as e:
+        # Non-fatal: the checkpointer still works with default journal settings
+        logger.warning(f"Не удалось применить PRAGMA к базе чекпоинтера: {e}")
+
 # Verification requires async context now, skip direct verification here
 # It will be verified implicitly during graph execution
 logger.info("Асинхронный SQLite чекпоинтер успешно инициализирован.")
@@ -3,6 +3,7 @@
 import logging
 from typing import Dict, Any, Optional, List
 
+from cachetools import TTLCache
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
@@ -10,6 +11,14 @@ from src.integrations.crm.factory import get_crm_adapter
 
 logger = logging.getLogger(__name__)
 
+# Formatted-summary cache: the agent often re-queries the same customer
+# within a conversation, and this skips both the adapter round-trip and
+# the formatting pass. Errors are cached separately with a short TTL —
+# enough to stop retry storms against a broken CRM without pinning a
+# transient failure for a whole minute.
+_summary_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
+_error_cache: TTLCache = TTLCache(maxsize=2048, ttl=5)
+
 # Initialize the CRM adapter using the factory
 _crm_adapter = get_crm_adapter()
 if _crm_adapter is None:
@@ -26,8 +35,21 @@ class CrmCustomerInfoInput(BaseModel):
     )
 
 
+class CrmCustomersInfoInput(BaseModel):
+    """Структура входных данных для инструмента get_crm_customers_info."""
+    customer_ids: List[str] = Field(
+        description="Список уникальных идентификаторов (ID) клиентов в CRM системе компании АРЕАЛ."
+    )
+
+
+async def aclose_crm_adapter() -> None:
+    """Closes the CRM adapter's pooled HTTP client on application shutdown."""
+    if _crm_adapter is not None:
+        await _crm_adapter.aclose()
+
+
 @tool(args_schema=CrmCustomerInfoInput)
-def get_crm_customer_info(customer_id: str) -> str:
+async def get_crm_customer_info(customer_id: str) -> str:
     """
     **Назначение:** Получает информацию о клиенте компании "АРЕАЛ" из CRM по его ID.
     **Данные:** Возвращает сводку, включающую: Название организации/Имя, Email, Телефон, количество связанных заявок/сделок, дату создания.
@@ -38,32 +60,80 @@ def get_crm_customer_info(customer_id: str) -> str:
     if _crm_adapter is None:
         logger.warning("Инструмент CRM вызван, но адаптер недоступен.")
         return "Функциональность CRM недоступна из-за ошибки конфигурации."
-    
+
+    cached = _summary_cache.get(customer_id) or _error_cache.get(customer_id)
+    if cached is not None:
+        logger.debug(f"Сводка по клиенту {customer_id} взята из кэша инструмента.")
+        return cached
+
     try:
-        result = _crm_adapter.get_customer_info(customer_id=customer_id)
-        
+        result = await _crm_adapter.get_customer_info(customer_id=customer_id)
+
         # Handle error string result
         if isinstance(result, str):
             logger.info(f"CRM вернул сообщение об ошибке: {result}")
+            _error_cache[customer_id] = result
             return result
-        
+
         # Handle None result (should not happen if adapter is configured, but for safety)
         if result is None:
             return "Информация о клиенте не была получена из CRM."
-            
+
         # Parse the result dictionary into a user-friendly string summary
         try:
-            return _format_customer_info(result)
+            summary = _format_customer_info(result)
+            _summary_cache[customer_id] = summary
+            return summary
         except Exception as format_err:
             logger.error(f"Ошибка форматирования информации о клиенте: {format_err}", exc_info=True)
             # Return a basic summary if formatting fails
             return f"Клиент найден (ID: {customer_id}), но не удалось отформатировать детали: {str(format_err)}"
-    
+
     except Exception as e:
         logger.error(f"Непредвиденная ошибка в инструменте get_crm_customer_info: {e}", exc_info=True)
         return f"Произошла непредвиденная ошибка при обработке запроса к CRM: {type(e).__name__}."
 
 
+@tool(args_schema=CrmCustomersInfoInput)
+async def get_crm_customers_info(customer_ids: List[str]) -> str:
+    """
+    **Назначение:** Получает информацию сразу о НЕСКОЛЬКИХ клиентах компании "АРЕАЛ" из CRM по списку их ID.
+    **Данные:** Возвращает сводку по каждому клиенту: Название организации/Имя, Email, Телефон, количество связанных заявок/сделок, дату создания.
+    **Когда использовать:** Применяй этот инструмент, если пользователь запрашивает информацию о двух и более КОНКРЕТНЫХ клиентах за один раз и их ID известны. Для одного клиента используй get_crm_customer_info.
+    **Пример запроса пользователя:** "Сравни клиентов 55123 и 55124", "Покажи данные по клиентам 101, 102 и 103".
+    **Результат:** Строка со сводкой по каждому клиенту (по одной на строку) или сообщениями об ошибках.
+    """
+    if _crm_adapter is None:
+        logger.warning("Инструмент CRM вызван, но адаптер недоступен.")
+        return "Функциональность CRM недоступна из-за ошибки конфигурации."
+    if not customer_ids:
+        return "Список ID клиентов пуст — нечего запрашивать."
+
+    try:
+        # The adapter fetches the contacts concurrently under one semaphore,
+        # so total latency is close to the slowest single request
+        results = await _crm_adapter.get_customers_info(customer_ids=customer_ids)
+    except Exception as e:
+        logger.error(f"Непредвиденная ошибка в инструменте get_crm_customers_info: {e}", exc_info=True)
+        return f"Произошла непредвиденная ошибка при обработке запроса к CRM: {type(e).__name__}."
+
+    lines = []
+    for customer_id, result in zip(customer_ids, results):
+        if isinstance(result, str):
+            lines.append(result)
+        elif result is None:
+            lines.append(f"Информация о клиенте {customer_id} не была получена из CRM.")
+        else:
+            try:
+                lines.append(_format_customer_info(result))
+            except Exception as format_err:
+                logger.error(f"Ошибка форматирования информации о клиенте: {format_err}", exc_info=True)
+                lines.append(
+                    f"Клиент найден (ID: {customer_id}), но не удалось отформатировать детали: {str(format_err)}"
+                )
+    return "\n".join(lines)
+
+
 def _format_customer_info(customer_data: Dict[str, Any]) -> str:
     """
     Форматирует сырые данные о клиенте из CRM в читаемую строку-сводку.
@@ -86,11 +156,15 @@ def _format_customer_info(customer_data: Dict[str, Any]) -> str:
     # AmoCRM typically stores these in custom_fields_values array
     custom_fields = customer_data.get('custom_fields_values', [])
     
-    email = _extract_custom_field_value(custom_fields, ['EMAIL', 'EMAILADDRESS', 'email'])
+    # One pass over the fields builds a lowercase code/name -> value index;
+    # each lookup afterwards is an O(1) dict probe instead of a linear scan
+    field_index = _index_custom_fields(custom_fields)
+
+    email = field_index.get('email') or field_index.get('emailaddress')
     if email:
         summary_parts.append(f"Email='{email}'")
-        
-    phone = _extract_custom_field_value(custom_fields, ['PHONE', 'TELEPHONE', 'phone'])
+
+    phone = field_index.get('phone') or field_index.get('telephone')
     if phone:
         summary_parts.append(f"Phone='{phone}'")
     
@@ -113,36 +187,32 @@ def _format_customer_info(customer_data: Dict[str, Any]) -> str:
     return ", ".join(summary_parts)
 
 
-def _extract_custom_field_value(
-    custom_fields: List[Dict[str, Any]],
-    possible_field_codes: List[str]
-) -> Optional[str]:
+def _index_custom_fields(custom_fields: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Вспомогательная функция для извлечения значения из списка кастомных полей AmoCRM.
-    Ищет поле по одному из возможных кодов (регистронезависимо) и возвращает первое найденное значение.
+    Вспомогательная функция: строит индекс кастомных полей AmoCRM за один проход.
+    Каждое поле попадает в словарь и под своим кодом, и под своим названием
+    (в нижнем регистре); при коллизии побеждает первое встреченное поле.
 
     Args:
         custom_fields: Список словарей кастомных полей из ответа API AmoCRM.
-        possible_field_codes: Список возможных кодов поля (например, ['EMAIL', 'Phone']).
 
     Returns:
-        Найденное значение поля в виде строки или None, если поле не найдено или пустое.
+        Словарь {код_или_название_в_нижнем_регистре: значение поля}.
     """
+    index: Dict[str, Any] = {}
     if not custom_fields:
-        return None
-        
-    # Lower case all possible codes for case-insensitive matching
-    possible_codes_lower = [code.lower() for code in possible_field_codes]
-    
+        return index
+
     for field in custom_fields:
-        field_code = field.get('field_code', '').lower()
-        field_name = field.get('field_name', '').lower()
-        
-        # Check if this field matches any of our target codes
-        if field_code in possible_codes_lower or field_name in possible_codes_lower:
-            # AmoCRM typically has values as a list with the first item containing the value
-            values = field.get('values', [])
-            if values and isinstance(values, list) and len(values) > 0:
-                return values[0].get('value')
-    
-    return None 
\ No newline at end of file
+        # AmoCRM typically has values as a list with the first item containing the value
+        values = field.get('values', [])
+        if not (values and isinstance(values, list)):
+            continue
+        value = values[0].get('value')
+        if value is None:
+            continue
+        for key in (field.get('field_code', ''), field.get('field_name', '')):
+            if key:
+                index.setdefault(key.lower(), value)
+
+    return index
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""Rule-based compression of retrieved context documents before prompting.
+
+Retrieved chunks are often several KB of boilerplate; prompt tokens scale
+cost, bandwidth and time-to-first-token linearly, so squeezing them before
+they reach the LLM pays on every turn.
+"""
+
+import logging
+import re
+from typing import List, Optional, Set, Tuple
+
+from src.utils.tokens import get_encoder
+
+logger = logging.getLogger(__name__)
+
+# Runs of spaces/tabs carry no meaning for the LLM but cost tokens
+_WHITESPACE_RE = re.compile(r"[ \t]+")
+
+# Docs this similar to an already-kept doc are near-duplicates and dropped
+_JACCARD_THRESHOLD = 0.85
+
+# Hard cap per document; protects the budget from one oversized chunk
+_PER_DOC_TOKEN_CAP = 400
+
+
+def _shingles(text: str, size: int = 5) -> Set[Tuple[str, ...]]:
+    """Word shingles used for cheap Jaccard similarity between docs."""
+    words = text.lower().split()
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: Set[Tuple[str, ...]], b: Set[Tuple[str, ...]]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def compress_docs(
+    docs: List[str],
+    model_name: str,
+    budget_tokens: int = 1600,
+) -> List[str]:
+    """
+    Compresses retrieved docs to fit a prompt token budget.
+
+    Applies, in order: whitespace-run collapsing, near-duplicate folding
+    (word-shingle Jaccard > 0.85 against already-kept docs), per-doc
+    truncation to a token cap, and an overall budget cutoff. Docs are kept
+    in retrieval (relevance) order, so the cutoff drops the least relevant
+    ones first.
+
+    Args:
+        docs: Retrieved document strings, most relevant first.
+        model_name: Chat model name, used to pick the token encoder.
+        budget_tokens: Total token budget across all kept docs.
+
+    Returns:
+        The compressed list of document strings (possibly shorter than input).
+    """
+    if not docs:
+        return docs
+
+    encoder = get_encoder(model_name)
+
+    kept: List[str] = []
+    kept_shingles: List[Set[Tuple[str, ...]]] = []
+    used_tokens = 0
+
+    for doc in docs:
+        # Collapse whitespace runs (keeps newlines — they often separate facts)
+        cleaned = _WHITESPACE_RE.sub(" ", doc).strip()
+        if not cleaned:
+            continue
+
+        # Fold near-duplicates of anything already kept
+        shingles = _shingles(cleaned)
+        if any(_jaccard(shingles, s) > _JACCARD_THRESHOLD for s in kept_shingles):
+            logger.debug("compress_docs: дубликат документа отброшен.")
+            continue
+
+        if encoder is not None:
+            tokens = encoder.encode(cleaned)
+            if len(tokens) > _PER_DOC_TOKEN_CAP:
+                cleaned = encoder.decode(tokens[:_PER_DOC_TOKEN_CAP])
+                tokens = tokens[:_PER_DOC_TOKEN_CAP]
+            if used_tokens + len(tokens) > budget_tokens:
+                logger.debug(
+                    f"compress_docs: бюджет токенов исчерпан, "
+                    f"отброшено {len(docs) - len(kept)} документов."
+                )
+                break
+            used_tokens += len(tokens)
+
+        kept.append(cleaned)
+        kept_shingles.append(shingles)
+
+    return kept
@@ -3,7 +3,61 @@
 import logging
 import sys
 
-from src.config.settings import settings
+from src.config.settings import get_settings
+
+try:
+    import orjson
+except ImportError:  # fall back to stdlib json if orjson is unavailable
+    orjson = None
+    import json
+
+
+# Level-name lookup and the text formatter are module-level: setup_logging
+# runs at every process start (each worker under a process manager), and
+# neither value depends on runtime state
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+_TEXT_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects.
+
+    Uses orjson when available (C-accelerated, ~3-5x faster than stdlib
+    json), so structured log output does not become its own hot spot. Any
+    extra attributes attached via `logger.info(..., extra={...})` are
+    included in the emitted object.
+    """
+
+    # Attributes present on every LogRecord; anything else came via extra=
+    _STANDARD_ATTRS = frozenset(vars(
+        logging.LogRecord("", 0, "", 0, "", (), None)
+    )) | {"message", "asctime", "taskName"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in self._STANDARD_ATTRS:
+                payload[key] = value
+
+        if orjson is not None:
+            return orjson.dumps(payload, default=str).decode()
+        return json.dumps(payload, default=str, ensure_ascii=False)
 
 
 def setup_logging() -> None:
@@ -11,14 +65,15 @@ def setup_logging() -> None:
     Sets up the root logger with a configured level and console handler.
 
     Retrieves the log level from the application settings, creates a
-    StreamHandler to output logs to stderr, defines a standard log format,
-    and adds the handler to the root logger. It prevents adding duplicate
-    handlers if called multiple times.
+    StreamHandler to output logs to stderr, defines a standard log format
+    (or JSON when LOG_FORMAT=json), and adds the handler to the root logger.
+    It prevents adding duplicate handlers if called multiple times.
     """
+    settings = get_settings()
     log_level_name = settings.LOG_LEVEL.upper()
-    numeric_level = getattr(logging, log_level_name, None)
+    numeric_level = _LEVELS.get(log_level_name)
 
-    if not isinstance(numeric_level, int):
+    if numeric_level is None:
         # Default to INFO if the level name is invalid
         logging.warning(
             f"Invalid log level '{settings.LOG_LEVEL}' in settings. "
@@ -41,10 +96,11 @@ def setup_logging() -> None:
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setLevel(numeric_level)
 
-    # Create formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-    )
+    # Pick formatter (text formatter is a shared module-level instance)
+    if settings.LOG_FORMAT.lower() == "json":
+        formatter: logging.Formatter = JSONFormatter()
+    else:
+        formatter = _TEXT_FORMATTER
 
     # Add formatter to handler
     console_handler.setFormatter(formatter)
@@ -53,4 +109,4 @@ def setup_logging() -> None:
     root_logger.addHandler(console_handler)
 
     # Optional: Log a confirmation message after setup
-    # logging.info(f"Logging configured with level: {log_level_name}") 
\ No newline at end of file
+    # logging.info(f"Logging configured with level: {log_level_name}")
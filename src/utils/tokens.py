@@ -0,0 +1,30 @@
+"""Shared, cached access to tiktoken encoders.
+
+Loading an encoder parses a ~MB BPE merges file; doing it per call would
+dwarf the cost of the encode itself. Encoders are cached per model name and
+shared by every token-counting call site (prompt compression, budgets).
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ships with langchain-openai, but stay defensive
+    tiktoken = None
+
+
+@lru_cache(maxsize=4)
+def get_encoder(model_name: str) -> Optional["tiktoken.Encoding"]:
+    """Returns a cached tiktoken encoder for the model, or None if unavailable."""
+    if tiktoken is None:
+        logger.warning("tiktoken недоступен. Подсчет токенов отключен.")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        # Newer/unknown models: cl100k_base is a close token-count proxy
+        return tiktoken.get_encoding("cl100k_base")